@@ -0,0 +1,233 @@
+"""
+JSON-версия лент и страницы поста для мобильного клиента.
+
+Строки читаются через ``.values()`` итератором и сразу пишутся в
+``StreamingHttpResponse``, поэтому память не растёт с размером страницы.
+Страницы курсорные, как и в HTML: в ответе есть ``next`` — курсор
+следующей страницы. Параметр ``?fields=id,title`` оставляет в постах
+только перечисленные поля, ``?limit=`` задаёт размер страницы.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, F, When
+from django.http import JsonResponse, StreamingHttpResponse
+
+from . import db_executor
+from .models import Category, Comment, User
+from .page_paginator import (
+    COMMENTS_ORDERING, CURSOR_PARAM, NEXT, POSTS_ORDERING, PREVIOUS,
+    KeysetPaginator, cursor_values, encode_cursor)
+from .posts_queryset import posts_queryset
+
+# Публичное имя поля -> поле или аннотация для .values().
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'category': 'category__slug',
+    'location': 'location_name',
+    'image': 'image',
+    'comment_count': 'comment_count',
+}
+POST_ANNOTATIONS = {
+    # Снятое с публикации место не показывается, как и в шаблонах.
+    'location_name': Case(
+        When(location__is_published=True, then=F('location__name'))),
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'text': 'text',
+    'created_at': 'created_at',
+}
+FORMATTERS = {
+    'image': lambda name: default_storage.url(name) if name else None,
+}
+# Сколько строк склеивать в один кусок потока.
+STREAM_BATCH = 100
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которая отдаётся клиенту в виде JSON."""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _requested_fields(request):
+    """Поля постов из ?fields=; без параметра — все."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(POST_FIELDS)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(POST_FIELDS))
+    if unknown:
+        raise ApiError(400, f'Неизвестные поля: {", ".join(unknown)}.')
+    return list(dict.fromkeys(names))
+
+
+def _page_size(request, default):
+    limit = request.GET.get('limit')
+    if limit is None:
+        return default
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ApiError(400, 'limit должен быть целым числом.')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def _values(queryset, fields, public_fields, *extra):
+    """Запрос .values() с запрошенными и служебными полями."""
+    paths = [fields[name] for name in public_fields]
+    annotations = {
+        name: expression for name, expression in POST_ANNOTATIONS.items()
+        if name in paths
+    }
+    return queryset.annotate(**annotations).values(
+        *dict.fromkeys([*paths, *extra]))
+
+
+def _serialize(row, fields, public_fields):
+    """Строка .values() с публичными именами полей."""
+    item = {}
+    for name in public_fields:
+        value = row[fields[name]]
+        formatter = FORMATTERS.get(name)
+        item[name] = formatter(value) if formatter else value
+    return item
+
+
+def _stream_rows(rows, per_page, ordering, serialize):
+    """Куски JSON-массива строк, затем курсор следующей страницы."""
+    yield '['
+    batch = []
+    separator = ''
+    last = None
+    next_cursor = None
+    for count, row in enumerate(rows):
+        if count == per_page:
+            next_cursor = encode_cursor(NEXT, cursor_values(last, ordering))
+            break
+        batch.append(_dumps(serialize(row)))
+        last = row
+        if len(batch) == STREAM_BATCH:
+            yield separator + ','.join(batch)
+            batch = []
+            separator = ','
+    if batch:
+        yield separator + ','.join(batch)
+    yield f'],"next":{_dumps(next_cursor)}'
+
+
+def _page_rows(queryset, request, per_page, ordering):
+    """Строки страницы, начиная с курсора; курсоры API только вперёд."""
+    paginator = KeysetPaginator(queryset, per_page, ordering)
+    direction, rows = paginator.page_queryset(request.GET.get(CURSOR_PARAM))
+    if direction == PREVIOUS:
+        direction, rows = paginator.page_queryset()
+    return rows.iterator(chunk_size=STREAM_BATCH)
+
+
+def stream_posts(request, queryset):
+    """Ответ со страницей постов ленты."""
+    public_fields = _requested_fields(request)
+    per_page = _page_size(request, settings.ITEMS_PER_PAGE)
+    rows = _page_rows(
+        _values(
+            queryset, POST_FIELDS, public_fields,
+            *(field.lstrip('-') for field in POSTS_ORDERING)),
+        request, per_page, POSTS_ORDERING)
+
+    def content():
+        yield '{"results":'
+        yield from _stream_rows(
+            rows, per_page, POSTS_ORDERING,
+            lambda row: _serialize(row, POST_FIELDS, public_fields))
+        yield '}'
+
+    return StreamingHttpResponse(
+        db_executor.stream(request, content()),
+        content_type='application/json')
+
+
+def api_view(view):
+    """Отдаём ApiError клиенту как JSON с нужным статусом."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(
+                {'detail': error.detail}, status=error.status,
+                json_dumps_params={'ensure_ascii': False})
+    return wrapper
+
+
+@api_view
+def index(request):
+    """Главная лента."""
+    return stream_posts(request, posts_queryset(hide=True))
+
+
+@api_view
+def category_posts(request, category_slug):
+    """Лента категории."""
+    category = Category.objects.filter(
+        slug=category_slug, is_published=True).first()
+    if category is None:
+        raise ApiError(404, 'Категория не найдена.')
+    return stream_posts(request, posts_queryset(
+        model_manager=category.posts, hide=True))
+
+
+@api_view
+def profile(request, username):
+    """Лента автора; владельцу видны и скрытые посты."""
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        raise ApiError(404, 'Пользователь не найден.')
+    return stream_posts(request, posts_queryset(
+        model_manager=author.posts, hide=request.user != author))
+
+
+@api_view
+def post_detail(request, post_id):
+    """Пост и страница его комментариев."""
+    public_fields = _requested_fields(request)
+    post = _values(
+        posts_queryset().filter(pk=post_id), POST_FIELDS, public_fields,
+        'is_visible', 'author_id').first()
+    if post is None or not (
+            post['is_visible'] or post['author_id'] == request.user.pk):
+        raise ApiError(404, 'Пост не найден.')
+    per_page = _page_size(request, settings.COMMENTS_PER_PAGE)
+    comments = _page_rows(
+        Comment.objects.filter(post_id=post_id).values(
+            *COMMENT_FIELDS.values()),
+        request, per_page, COMMENTS_ORDERING)
+
+    def content():
+        yield '{"post":' + _dumps(
+            _serialize(post, POST_FIELDS, public_fields))
+        yield ',"comments":'
+        yield from _stream_rows(
+            comments, per_page, COMMENTS_ORDERING,
+            lambda row: _serialize(row, COMMENT_FIELDS, COMMENT_FIELDS))
+        yield '}'
+
+    return StreamingHttpResponse(
+        db_executor.stream(request, content()),
+        content_type='application/json')
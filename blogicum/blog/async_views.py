@@ -0,0 +1,135 @@
+"""
+Асинхронные варианты страниц ленты и поста для работы под ASGI.
+
+Включаются настройкой ASYNC_VIEWS. Запросы к базе и рендеринг идут в
+ограниченном пуле потоков (db_executor), а независимые запросы —
+одновременно: категория и страница её ленты, пост и порция его
+комментариев, лента и пользователь из сессии. Кэш страниц, кэш лент и
+условные GET работают так же, как у синхронных представлений.
+"""
+from calendar import timegm
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import db_executor
+from .conditional import conditional_render, feed_validators, post_validators
+from .feed_cache import cached_page_paginator
+from .forms import CommentForm
+from .models import Category, Comment
+from .page_cache import cache_page_for_visitors
+from .page_paginator import comments_paginator, page_paginator
+from .posts_queryset import posts_queryset
+from .views import get_readable_post
+
+User = get_user_model()
+
+
+def _load_user(request):
+    """Загружаем пользователя из сессии заранее, параллельно с лентой."""
+    return request.user.is_authenticated
+
+
+def _is_owner(request, username):
+    return request.user.username == username
+
+
+def _render_feed(request, template_name, context, *parts):
+    return conditional_render(
+        request, template_name, context,
+        feed_validators(context['page_obj'], *parts))
+
+
+@cache_page_for_visitors()
+async def index(request):
+    """Главная страница."""
+    context, _ = await db_executor.gather(
+        (cached_page_paginator, 'index', posts_queryset(hide=True), request),
+        (_load_user, request),
+    )
+    return await db_executor.run(
+        _render_feed, request, 'blog/index.html', context)
+
+
+@cache_page_for_visitors()
+async def category_posts(request, category_slug):
+    """Страница с постами в выбранной категории."""
+    # Лента выбирается по slug, поэтому не ждёт запроса категории.
+    category, context, _ = await db_executor.gather(
+        (partial(
+            get_object_or_404, Category,
+            slug=category_slug, is_published=True),),
+        (cached_page_paginator, f'category:{category_slug}',
+         posts_queryset(hide=True).filter(category__slug=category_slug),
+         request),
+        (_load_user, request),
+    )
+    context['category'] = category
+    return await db_executor.run(
+        _render_feed, request, 'blog/category.html', context,
+        category.updated_at)
+
+
+@cache_page_for_visitors(anonymous_only=True)
+async def profile(request, username):
+    """Страница пользователя."""
+    # Пользователь из сессии загружается в пуле: HEAD и POST проходят
+    # мимо кэша страниц и приходят сюда с ещё не загруженным request.user.
+    profile, is_owner = await db_executor.gather(
+        (partial(get_object_or_404, User, username=username),),
+        (_is_owner, request, username),
+    )
+    if is_owner:
+        context = await db_executor.run(
+            page_paginator,
+            posts_queryset(model_manager=profile.posts), request)
+    else:
+        context = await db_executor.run(
+            cached_page_paginator, f'author:{profile.pk}',
+            posts_queryset(model_manager=profile.posts, hide=True),
+            request)
+    context['profile'] = profile
+    return await db_executor.run(
+        _render_feed, request, 'blog/profile.html', context, is_owner,
+        profile.get_full_name(), profile.is_staff)
+
+
+@cache_page_for_visitors(anonymous_only=True)
+async def _post_page(request, post_id):
+    # Комментарии выбираются по id поста и отбрасываются, если пост
+    # посетителю не виден (тогда get_readable_post бросит Http404).
+    post, comments = await db_executor.gather(
+        (get_readable_post, request, post_id),
+        (comments_paginator,
+         Comment.objects.filter(post_id=post_id).select_related('author'),
+         request),
+    )
+    response = await db_executor.run(
+        render, request, 'blog/detail.html',
+        {'post': post, 'comments': comments, 'form': CommentForm()})
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+async def post_detail(request, post_id):
+    """Страница отдельного поста."""
+    (etag, last_modified), _ = await db_executor.gather(
+        (post_validators, request, post_id),
+        (_load_user, request),
+    )
+    timestamp = last_modified and timegm(last_modified.utctimetuple())
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        return not_modified
+    response = await _post_page(request, post_id)
+    # Как у декоратора condition в синхронном варианте.
+    if request.method in ('GET', 'HEAD'):
+        if timestamp and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(timestamp)
+        if etag and not response.has_header('ETag'):
+            response['ETag'] = etag
+    return response
@@ -0,0 +1,106 @@
+"""
+Условные GET-запросы (ETag / Last-Modified).
+
+Валидаторы считаются одним агрегирующим запросом по updated_at поста,
+его категории и места, поэтому ответ 304 отдаётся без рендеринга шаблона.
+Комментарии и правки профилей сдвигают updated_at поста в сигналах.
+Страницы гостя и вошедшего пользователя различаются (шапка, форма
+комментария, кнопки автора), поэтому в ETag входит и посетитель:
+``Vary: Cookie`` не мешает браузеру перепроверить копию гостя по её ETag.
+"""
+import hashlib
+from calendar import timegm
+from datetime import datetime
+
+from django.db.models import Max
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Post
+
+VERSION_FIELDS = {
+    'post': Max('updated_at'),
+    'category': Max('category__updated_at'),
+    'location': Max('location__updated_at'),
+}
+
+
+def make_validators(*parts):
+    """Считаем ETag по частям версии, Last-Modified — по свежей дате."""
+    dates = [part for part in parts if isinstance(part, datetime)]
+    last_modified = max(dates) if dates else None
+    etag = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'"{etag}"', last_modified
+
+
+def viewer_etag(request, etag):
+    """Значение ETag для посетителя: общее у гостей, своё у пользователя."""
+    if etag is None or not request.user.is_authenticated:
+        return etag
+    digest = hashlib.md5(f'{etag}:{request.user.pk}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def post_validators(request, post_id):
+    """Валидаторы страницы поста; считаются один раз на запрос."""
+    if getattr(request, '_post_validators', None) is None:
+        versions = Post.objects.filter(pk=post_id).aggregate(
+            **VERSION_FIELDS)
+        if versions['post'] is None:
+            request._post_validators = (None, None)
+        else:
+            etag, last_modified = make_validators(
+                post_id, *versions.values())
+            request._post_validators = (
+                viewer_etag(request, etag), last_modified)
+    return request._post_validators
+
+
+def post_etag(request, post_id):
+    """Значение ETag страницы поста."""
+    return post_validators(request, post_id)[0]
+
+
+def post_last_modified(request, post_id):
+    """Last-Modified страницы поста."""
+    return post_validators(request, post_id)[1]
+
+
+def feed_validators(page_obj, *parts):
+    """
+    Валидаторы страницы ленты.
+
+    Посты страницы уже загружены вместе с категориями и местами, поэтому
+    отдельный запрос не нужен.
+    """
+    versions = []
+    for post in page_obj:
+        versions.append(post.pk)
+        versions.extend(
+            related.updated_at
+            for related in (post, post.category, post.location)
+            if related is not None
+        )
+    return make_validators(*parts, *versions)
+
+
+def conditional_render(request, template_name, context, validators):
+    """render(), который отвечает 304, если у клиента свежая копия."""
+    base_etag, last_modified = validators
+    etag = viewer_etag(request, base_etag)
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and timegm(last_modified.utctimetuple()),
+    )
+    if response is None:
+        response = render(request, template_name, context)
+    response['ETag'] = etag
+    # Кэш страниц хранит общий ETag и сам добавляет к нему посетителя.
+    response.base_etag = base_etag
+    if last_modified:
+        response['Last-Modified'] = http_date(
+            timegm(last_modified.utctimetuple()))
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,173 @@
+"""
+Урезанный Bootstrap и критический CSS для первой отрисовки.
+
+Из всех шаблонов проекта, кода приложений и django_bootstrap5 (он сам
+подставляет классы форм и кнопок) собираются слова, похожие на имена
+классов и тегов. Правило остаётся, если хотя бы один его селектор
+использует только найденные классы. Для критического CSS берутся только
+шаблоны шапки (base.html и её include), и селекторы проверяются ещё и по
+тегам. Разбор рассчитан на минифицированный CSS вроде bootstrap.min.css:
+комментарии только между правилами, вложенность только в @media/@supports.
+"""
+import re
+from pathlib import Path
+
+WORD_RE = re.compile(r'[A-Za-z_][\w-]*')
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+ELEMENT_RE = re.compile(r'(?:^|[\s>+~(])([a-zA-Z][a-zA-Z0-9-]*)')
+ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+AT_RULE_RE = re.compile(r'@([\w-]+)')
+KEYFRAMES_NAME_RE = re.compile(r'@[\w-]*keyframes\s+([\w-]+)')
+SOURCE_SUFFIXES = ('.html', '.txt', '.py', '.js')
+NESTED_AT_RULES = ('media', 'supports')
+# Классы, которые появляются только во время работы страницы.
+SAFELIST = frozenset((
+    'active', 'disabled', 'show', 'fade', 'collapsing', 'collapsed',
+    'was-validated', 'is-valid', 'is-invalid', 'valid-feedback',
+    'invalid-feedback',
+))
+# Шаблоны, которые видны до прокрутки на любой странице.
+CRITICAL_TEMPLATES = (
+    'base.html',
+    'includes/header.html',
+    'includes/header_user.html',
+    'includes/footer.html',
+)
+
+
+def words(paths):
+    """Слова из файлов-источников (и файлов в каталогах-источниках)."""
+    found = set()
+    for path in map(Path, paths):
+        files = path.rglob('*') if path.is_dir() else [path]
+        for file in files:
+            if file.suffix in SOURCE_SUFFIXES and file.is_file():
+                found.update(WORD_RE.findall(
+                    file.read_text(encoding='utf-8', errors='ignore')))
+    return found
+
+
+def _string_end(css, position):
+    """Позиция после строки в кавычках, начинающейся в position."""
+    quote = css[position]
+    position += 1
+    while position < len(css) and css[position] != quote:
+        position += 2 if css[position] == '\\' else 1
+    return position + 1
+
+
+def _comment(css, start, position, depth, items):
+    """Пропускаем комментарий; лицензию между правилами сохраняем."""
+    end = css.find('*/', position + 2)
+    end = len(css) if end < 0 else end + 2
+    if depth == 0 and not css[start:position].strip():
+        if css.startswith('/*!', position):
+            items.append(('comment', css[position:end]))
+        start = end
+    return start, end
+
+
+def split_blocks(css):
+    """
+    Разбор верхнего уровня CSS.
+
+    Элементы: ('comment', текст) для /*! ... */, ('statement', текст) для
+    @charset и подобных, ('block', заголовок, тело) для правил.
+    """
+    items = []
+    start = position = depth = 0
+    prelude = body_start = None
+    while position < len(css):
+        char = css[position]
+        if css.startswith('/*', position):
+            start, position = _comment(css, start, position, depth, items)
+            continue
+        if char in '"\'':
+            position = _string_end(css, position)
+            continue
+        if char == '{':
+            if depth == 0:
+                prelude, body_start = css[start:position].strip(), position + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                items.append(('block', prelude, css[body_start:position]))
+                start = position + 1
+        elif char == ';' and depth == 0:
+            items.append(('statement', css[start:position + 1].strip()))
+            start = position + 1
+        position += 1
+    return items
+
+
+def split_selectors(prelude):
+    """Селекторы списка через запятую, не разрывая :not(...) и [...]."""
+    selectors = []
+    depth = start = 0
+    for position, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:position].strip())
+            start = position + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+class CssPurger:
+    """Оставляет правила CSS, селекторы которых используются в шаблонах."""
+
+    def __init__(self, used, check_elements=False, standalone=True):
+        self.used = set(used) | SAFELIST
+        self.used_lower = {word.lower() for word in self.used}
+        self.check_elements = check_elements
+        # Отдельный файл сохраняет лицензию и @charset, встраиваемый — нет.
+        self.standalone = standalone
+
+    def keep_selector(self, selector):
+        bare = ATTRIBUTE_RE.sub('', selector)
+        if any(name not in self.used for name in CLASS_RE.findall(bare)):
+            return False
+        return not self.check_elements or all(
+            name.lower() in self.used_lower
+            for name in ELEMENT_RE.findall(bare))
+
+    def purge_rules(self, css, keyframes):
+        output = []
+        for kind, *parts in split_blocks(css):
+            if kind in ('comment', 'statement'):
+                if self.standalone:
+                    output.append(parts[0])
+            else:
+                prelude, body = parts
+                output.append(self.purge_block(prelude, body, keyframes))
+        return ''.join(output)
+
+    def purge_block(self, prelude, body, keyframes):
+        if not prelude.startswith('@'):
+            selectors = [
+                selector for selector in split_selectors(prelude)
+                if self.keep_selector(selector)
+            ]
+            return f'{",".join(selectors)}{{{body}}}' if selectors else ''
+        name = AT_RULE_RE.match(prelude).group(1).lower()
+        if name in NESTED_AT_RULES:
+            inner = self.purge_rules(body, keyframes)
+            return f'{prelude}{{{inner}}}' if inner else ''
+        if name.endswith('keyframes'):
+            # Анимация остаётся, только если на неё ссылаются правила.
+            keyframes.append((
+                KEYFRAMES_NAME_RE.match(prelude).group(1),
+                f'{prelude}{{{body}}}'))
+            return ''
+        return f'{prelude}{{{body}}}'
+
+    def purge(self, css):
+        keyframes = []
+        output = self.purge_rules(css, keyframes)
+        used_animations = set(WORD_RE.findall(output))
+        return output + ''.join(
+            text for name, text in keyframes if name in used_animations)
@@ -0,0 +1,124 @@
+"""
+Пул потоков для запросов к базе из асинхронных представлений.
+
+ORM синхронная, поэтому асинхронные представления отдают запросы и
+рендеринг шаблонов сюда. Размер пула (ASYNC_DB_WORKERS) ограничивает и
+число одновременных соединений с базой: у каждого потока своё.
+При ``ASYNC_DB_WORKERS = 0`` вызовы идут в общий поток синхронного кода
+Django, как у обычного sync_to_async, — так работают и тесты в транзакции.
+"""
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connection
+
+# Сколько готовых кусков потокового ответа держать впереди отправки.
+STREAM_BUFFER = 16
+_DONE = object()
+
+_executor = None
+
+
+def get_executor():
+    """Общий пул потоков для базы."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_DB_WORKERS,
+            thread_name_prefix='db')
+    return _executor
+
+
+def _in_worker(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # В потоке пула нет обработчика запроса, который закрывал бы
+        # устаревшие соединения, — делаем это сами (см. CONN_MAX_AGE).
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+async def run(func, *args, **kwargs):
+    """Выполняем синхронную функцию в пуле для базы."""
+    if not settings.ASYNC_DB_WORKERS:
+        return await sync_to_async(func)(*args, **kwargs)
+    return await sync_to_async(
+        _in_worker(func), thread_sensitive=False,
+        executor=get_executor())(*args, **kwargs)
+
+
+async def gather(*calls):
+    """
+    Независимые вызовы одновременно; вызов — кортеж (функция, аргументы).
+
+    Первая ошибка пробрасывается сразу, не дожидаясь остальных вызовов.
+    """
+    return await asyncio.gather(*(run(*call) for call in calls))
+
+
+def _put(buffer, item, stopped):
+    """Ждём места в очереди, пока чтение не прекращено; False — прекращено."""
+    while not stopped.is_set():
+        try:
+            buffer.put(item, timeout=1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _produce(chunks, buffer, stopped):
+    """Поток-производитель: кладём куски в очередь, пока их ждут."""
+    try:
+        for chunk in chunks:
+            if not _put(buffer, (chunk, None), stopped):
+                return
+        item = (_DONE, None)
+    except Exception as error:
+        item = (_DONE, error)
+    finally:
+        connection.close()
+    _put(buffer, item, stopped)
+
+
+def _consume(buffer, stopped):
+    try:
+        while True:
+            chunk, error = buffer.get()
+            if error is not None:
+                raise error
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        # Клиент отключился или ответ дочитан — производитель больше не нужен.
+        stopped.set()
+
+
+def stream(request, chunks):
+    """
+    Куски потокового ответа, которые читают базу.
+
+    Django 3.2 под ASGI перебирает StreamingHttpResponse прямо в цикле
+    событий, где ORM запрещена (SynchronousOnlyOperation). Поэтому под ASGI
+    куски готовит отдельный поток и передаёт через ограниченную очередь;
+    под WSGI генератор отдаётся как есть.
+    """
+    if not isinstance(request, ASGIRequest):
+        return chunks
+    buffer = queue.Queue(maxsize=STREAM_BUFFER)
+    stopped = threading.Event()
+    threading.Thread(
+        target=_produce, args=(chunks, buffer, stopped),
+        name='db-stream', daemon=True).start()
+    return _consume(buffer, stopped)
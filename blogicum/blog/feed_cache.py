@@ -0,0 +1,150 @@
+"""
+Кэш страниц лент.
+
+В кэше лежат только id постов страницы и данные для навигации, сами строки
+всегда читаются одним запросом ``id__in``, поэтому заголовки, счётчики
+комментариев и имена авторов на карточках не устаревают.
+
+Ключ страницы содержит номер поколения ленты: ``feed:index:v{N}:p{page}``.
+Сигналы моделей увеличивают счётчик поколения, и старые ключи просто
+перестают читаться — сканировать или удалять их не нужно. Поколение
+``all`` общее для всех лент и сбрасывается изменениями категорий.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .page_paginator import (
+    CURSOR_PARAM, POSTS_ORDERING, CursorPage, KeysetPaginator,
+    page_paginator)
+
+GLOBAL_SCOPE = 'all'
+
+
+def _generation_key(scope):
+    return f'feed:{scope}:gen'
+
+
+def get_version(scope):
+    """Версия ленты: поколение всех лент и поколение самой ленты."""
+    keys = [_generation_key(GLOBAL_SCOPE), _generation_key(scope)]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Начинаем с текущего времени, чтобы после вытеснения счётчика
+            # не вернуться к номеру, под которым ещё лежат старые страницы.
+            cache.add(key, time.time_ns() // 1000, timeout=None)
+            generations[key] = cache.get(key)
+    return '{}.{}'.format(*(generations[key] for key in keys))
+
+
+def bump(*scopes):
+    """Сбрасываем ленты, увеличивая их поколение."""
+    for scope in scopes:
+        try:
+            cache.incr(_generation_key(scope))
+        except ValueError:
+            # Счётчика нет — значит, под этой лентой ничего не закэшировано.
+            pass
+
+
+def post_scopes(category_slug, author_id):
+    """Ленты, в которые может попасть пост."""
+    scopes = ['index', f'author:{author_id}']
+    if category_slug:
+        scopes.append(f'category:{category_slug}')
+    return scopes
+
+
+def _page_token(request, queryset, ordering):
+    """
+    Часть ключа кэша со страницей — из проверенного курсора или номера.
+
+    Строка из запроса в ключ не попадает: неверный курсор — это первая
+    страница, а неверный номер — номер, который выберет Paginator, так
+    что мусорные параметры не плодят копии страниц в кэше.
+    """
+    if settings.KEYSET_PAGINATION:
+        direction, values = KeysetPaginator(
+            queryset, settings.ITEMS_PER_PAGE, ordering,
+        ).parse_cursor(request.GET.get(CURSOR_PARAM))
+        if direction is None:
+            return 'first'
+        digest = hashlib.md5(json.dumps(
+            values, cls=DjangoJSONEncoder).encode()).hexdigest()
+        return f'{direction}{digest}'
+    try:
+        number = int(request.GET.get('page') or 1)
+    except ValueError:
+        return '1'
+    # Номер меньше единицы Paginator.get_page заменяет последней страницей.
+    return str(number) if number >= 1 else 'last'
+
+
+def _stored_token(page_obj, token):
+    """Номерная страница кэшируется под номером, который вышел на деле."""
+    if isinstance(page_obj, CursorPage):
+        return token
+    return str(page_obj.number)
+
+
+def _dump(page_obj):
+    payload = {'ids': [post.pk for post in page_obj]}
+    if isinstance(page_obj, CursorPage):
+        payload['has_next'] = page_obj.has_next()
+        payload['has_previous'] = page_obj.has_previous()
+    else:
+        payload['number'] = page_obj.number
+        payload['count'] = page_obj.paginator.count
+    return payload
+
+
+def _restore(payload, queryset, ordering):
+    posts = queryset.in_bulk(payload['ids'])
+    object_list = [posts[pk] for pk in payload['ids'] if pk in posts]
+    if 'count' not in payload:
+        return CursorPage(
+            object_list, ordering,
+            payload['has_next'], payload['has_previous'])
+    paginator = Paginator(queryset, settings.ITEMS_PER_PAGE)
+    paginator.count = payload['count']
+    return Page(object_list, payload['number'], paginator)
+
+
+def cached_page_paginator(
+        scope, queryset, request, ordering=POSTS_ORDERING):
+    """Пагинатор с кэшем id страницы и защитой от «набега» пересчётов."""
+    token = _page_token(request, queryset, ordering)
+    version = get_version(scope)
+    key = f'feed:{scope}:v{version}:p{token}'
+    payload = cache.get(key)
+    if payload is not None:
+        return {'page_obj': _restore(payload, queryset, ordering)}
+
+    stale_key = f'feed:{scope}:stale:p{token}'
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, settings.FEED_CACHE_LOCK_TIMEOUT):
+        # Страницу уже пересчитывает другой запрос — отдаём прошлую версию.
+        stale = cache.get(stale_key)
+        if stale is not None:
+            return {'page_obj': _restore(stale, queryset, ordering)}
+        return page_paginator(queryset, request, ordering)
+    try:
+        context = page_paginator(queryset, request, ordering)
+        payload = _dump(context['page_obj'])
+        # Номер за концом ленты даёт последнюю страницу: её и кэшируем.
+        token = _stored_token(context['page_obj'], token)
+        cache.set(
+            f'feed:{scope}:v{version}:p{token}', payload,
+            settings.FEED_CACHE_TIMEOUT)
+        cache.set(
+            f'feed:{scope}:stale:p{token}', payload,
+            settings.FEED_CACHE_STALE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+    return context
@@ -1,7 +1,9 @@
 """Формы."""
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Post, Comment, User
+from .uploads import ingest_image
 
 
 class PostForm(forms.ModelForm):
@@ -18,6 +20,13 @@ class PostForm(forms.ModelForm):
                 format='%Y-%m-%dT%H:%M')
         }
 
+    def clean_image(self):
+        """Новую картинку пропускаем через приём загрузок."""
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            image = ingest_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """Форма создания, редактирования, удаления комментариев."""
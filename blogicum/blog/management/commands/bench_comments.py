@@ -0,0 +1,71 @@
+"""Всплеск комментариев из многих потоков: через очередь записи и без неё."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from blog import write_queue
+from blog.models import Comment, Post
+
+from .bench_views import stock_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет комментарии из многих потоков и считает комментарии в '
+        'секунду и ошибки «database is locked». Созданные комментарии '
+        'удаляются в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comments', type=int, default=1000,
+            help='Всего комментариев.')
+        parser.add_argument(
+            '--threads', type=int, default=32,
+            help='Потоков-отправителей.')
+        parser.add_argument(
+            '--direct', action='store_true',
+            help='Писать из каждого потока напрямую, без очереди записи.')
+        parser.add_argument(
+            '--stock-db', action='store_true',
+            help='Без прагм SQLite и постоянных соединений.')
+
+    def handle(self, *args, comments, threads, direct, stock_db, **options):
+        post = Post.objects.select_related('author').first()
+        if post is None:
+            raise CommandError('Нет постов для комментариев.')
+        created = []
+
+        def send(number):
+            comment = Comment(
+                post=post, author=post.author, text=f'bench {number}')
+            save = transaction.atomic(comment.save)
+            try:
+                if direct:
+                    save()
+                else:
+                    write_queue.run(save)
+            except (OperationalError, write_queue.WriteQueueBusy) as error:
+                return str(error)
+            finally:
+                connection.close()
+            created.append(comment.pk)
+            return None
+
+        with stock_database(stock_db):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                errors = [error for error in pool.map(send, range(comments))
+                          if error]
+            elapsed = time.perf_counter() - started
+            for comment in Comment.objects.filter(pk__in=created):
+                comment.delete()
+
+        mode = 'напрямую' if direct else 'через очередь'
+        self.stdout.write(
+            f'{mode}: {len(created)} из {comments} комментариев, '
+            f'{len(created) / elapsed:.1f} в секунду, ошибок {len(errors)}')
+        for error in sorted(set(errors)):
+            self.stdout.write(f'  {error}: {errors.count(error)}')
@@ -0,0 +1,174 @@
+"""Замер пропускной способности страниц ленты и поста в одном процессе."""
+import asyncio
+import importlib
+from contextlib import contextmanager
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, resolve, reverse
+
+from blog import urls as blog_urls
+from blog.models import Category, Post
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+# Значения SQLite по умолчанию: журнал отката, без mmap, кэш 2 МБ.
+STOCK_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'temp_store': 'DEFAULT',
+    'mmap_size': 0,
+    'cache_size': -2000,
+}
+
+
+def default_paths():
+    """Главная, первая категория, первый автор и первый пост с данными."""
+    post = Post.objects.filter(is_visible=True).select_related(
+        'author').first()
+    if post is None:
+        raise CommandError('Нет опубликованных постов для замера.')
+    category = Category.objects.filter(is_published=True).first()
+    paths = [
+        reverse('blog:index'),
+        reverse('blog:profile', args=[post.author.username]),
+        reverse('blog:post_detail', args=[post.pk]),
+    ]
+    if category is not None:
+        paths.append(reverse('blog:category_posts', args=[category.slug]))
+    return paths
+
+
+def reload_urlconf():
+    """Вариант представлений выбирается при импорте blog.urls."""
+    importlib.reload(blog_urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def stock_database(enabled):
+    """Без прагм и постоянных соединений — база «как из коробки»."""
+    if not enabled:
+        yield
+        return
+    # Соединения потоков создаются из этого же словаря настроек.
+    database = connections.settings[connection.alias]
+    saved = database['PRAGMAS'], database['CONN_MAX_AGE']
+    database['PRAGMAS'] = {**saved[0], **STOCK_PRAGMAS}
+    database['CONN_MAX_AGE'] = 0
+    connection.close()
+    # Журнал хранится в файле базы: переключаем его один раз, иначе
+    # соединения потоков мешали бы друг другу его сменить.
+    connection.ensure_connection()
+    database['PRAGMAS']['journal_mode'] = None
+    connection.close()
+    try:
+        yield
+    finally:
+        database['PRAGMAS'], database['CONN_MAX_AGE'] = saved
+        connection.close()
+
+
+def percentile(values, share):
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Меряет запросы в секунду к главной, категории, профилю и посту '
+        'в синхронном (WSGI) или асинхронном (ASGI) варианте; запускайте '
+        'оба режима по очереди и сравнивайте.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', choices=('sync', 'async'), default='sync',
+            help='sync — WSGI и потоки, async — ASGI и корутины.')
+        parser.add_argument(
+            '--requests', type=int, default=400,
+            help='Всего запросов.')
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Одновременных запросов.')
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Без кэша страниц и лент: мерить путь до базы.')
+        parser.add_argument(
+            '--stock-db', action='store_true',
+            help='Без прагм SQLite и постоянных соединений, для сравнения.')
+        parser.add_argument(
+            'paths', nargs='*', help='Адреса; по умолчанию — типовой набор.')
+
+    def handle(self, *args, mode, requests, concurrency, paths, **options):
+        overrides = {
+            'ASYNC_VIEWS': mode == 'async',
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'DEBUG': False,
+        }
+        if options['no_cache']:
+            overrides['CACHES'] = DUMMY_CACHES
+        with override_settings(**overrides), \
+                stock_database(options['stock_db']):
+            reload_urlconf()
+            paths = paths or default_paths()
+            is_async = asyncio.iscoroutinefunction(
+                resolve(reverse('blog:index')).func)
+            if is_async != (mode == 'async'):
+                raise CommandError('Не удалось переключить представления.')
+            queue = list(islice(cycle(paths), requests))
+            started = time.perf_counter()
+            if mode == 'async':
+                results = async_to_sync(self.run_async)(queue, concurrency)
+            else:
+                results = self.run_sync(queue, concurrency)
+            elapsed = time.perf_counter() - started
+        reload_urlconf()
+        self.report(mode, results, elapsed, concurrency)
+
+    def run_sync(self, queue, concurrency):
+        local = threading.local()
+
+        def fetch(path):
+            # Свой клиент (и соединение с базой) у каждого потока.
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            client = local.client
+            started = time.perf_counter()
+            status = client.get(path).status_code
+            return status, time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(fetch, queue))
+
+    async def run_async(self, queue, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def fetch(path):
+            async with limit:
+                started = time.perf_counter()
+                response = await client.get(path)
+                return response.status_code, time.perf_counter() - started
+
+        return await asyncio.gather(*(fetch(path) for path in queue))
+
+    def report(self, mode, results, elapsed, concurrency):
+        latencies = [latency for _, latency in results]
+        errors = sum(status >= 500 for status, _ in results)
+        self.stdout.write(
+            f'{mode}: {len(results)} запросов, {concurrency} одновременно, '
+            f'{len(results) / elapsed:.1f} запр/с, '
+            f'медиана {statistics.median(latencies) * 1000:.1f} мс, '
+            f'p95 {percentile(latencies, 0.95) * 1000:.1f} мс, '
+            f'ошибок {errors}')
@@ -0,0 +1,78 @@
+"""Урезанный Bootstrap и критический CSS по шаблонам проекта."""
+import importlib
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.css_purge import CRITICAL_TEMPLATES, CssPurger, words
+
+SOURCE_CSS = 'css/bootstrap.min.css'
+PURGED_CSS = 'css/bootstrap.purged.css'
+CRITICAL_TEMPLATE = 'includes/critical_css.html'
+# Пакеты, которые сами выводят классы Bootstrap.
+EXTRA_PACKAGES = ('django_bootstrap5',)
+
+
+def template_dirs():
+    return [Path(path) for path in settings.TEMPLATES[0]['DIRS']]
+
+
+def project_sources():
+    """Шаблоны, код приложений проекта и пакетов из EXTRA_PACKAGES."""
+    sources = template_dirs()
+    base = Path(settings.BASE_DIR)
+    sources.extend(
+        Path(config.path) for config in apps.get_app_configs()
+        if Path(config.path).is_relative_to(base))
+    sources.extend(
+        Path(importlib.import_module(name).__file__).parent
+        for name in EXTRA_PACKAGES)
+    return sources
+
+
+def critical_sources():
+    return [
+        directory / name for directory in template_dirs()
+        for name in CRITICAL_TEMPLATES if (directory / name).exists()
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет урезанный bootstrap.min.css только с используемыми в '
+        'шаблонах правилами и критический CSS шапки для встраивания.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purged',
+            default=Path(settings.STATICFILES_DIRS[0]) / PURGED_CSS,
+            help='Куда записать урезанную таблицу стилей.')
+        parser.add_argument(
+            '--critical',
+            default=template_dirs()[0] / CRITICAL_TEMPLATE,
+            help='Куда записать шаблон с критическим CSS.')
+
+    def handle(self, *args, purged, critical, **options):
+        source = finders.find(SOURCE_CSS)
+        if source is None:
+            raise CommandError(f'Не найден {SOURCE_CSS}.')
+        css = Path(source).read_text(encoding='utf-8')
+
+        purged_css = CssPurger(words(project_sources())).purge(css)
+        Path(purged).write_text(purged_css, encoding='utf-8')
+
+        critical_css = CssPurger(
+            words(critical_sources()), check_elements=True,
+            standalone=False).purge(css)
+        # verbatim: фигурные скобки CSS не должны разбираться шаблонизатором.
+        Path(critical).write_text(
+            f'{{% verbatim %}}{critical_css}{{% endverbatim %}}\n',
+            encoding='utf-8')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Стили: {len(css)} -> {len(purged_css)} байт, '
+            f'критические: {len(critical_css)} байт.'))
@@ -0,0 +1,72 @@
+"""Копии и данные картинок уже загруженных постов."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from blog.models import Post
+from blog.renditions import make_renditions, store_renditions
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+def render_image(task):
+    """Задача процесса: копии и данные одной картинки; база не нужна."""
+    post_id, image_name = task
+    try:
+        return post_id, image_name, make_renditions(image_name), None
+    except Exception as error:
+        return post_id, image_name, None, str(error)
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит уменьшенные копии и данные картинок постов параллельно '
+        'на всех ядрах; по умолчанию только там, где их ещё нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перестроить копии и данные у всех постов с картинками.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Количество картинок, отдаваемых пулу за раз.')
+
+    def handle(self, *args, workers, force, chunk_size, **options):
+        queryset = Post.objects.exclude(image='').order_by('pk')
+        if not force:
+            queryset = queryset.filter(
+                Q(image_meta__renditions__isnull=True)
+                | Q(image_meta__sha256__isnull=True))
+        # Процессы получают копию родителя, открытое соединение им ни к чему.
+        connections.close_all()
+        built = failed = 0
+        last_id = 0
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('fork')) as pool:
+            while True:
+                tasks = list(
+                    queryset.filter(pk__gt=last_id)
+                    .values_list('pk', 'image')[:chunk_size])
+                if not tasks:
+                    break
+                last_id = tasks[-1][0]
+                for post_id, image_name, image_meta, error in pool.map(
+                        render_image, tasks):
+                    if error:
+                        failed += 1
+                        self.stderr.write(
+                            f'Пост {post_id}, {image_name}: {error}')
+                        continue
+                    store_renditions(post_id, image_name, image_meta)
+                    built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Построены копии: {built}, ошибок: {failed}'))
@@ -0,0 +1,53 @@
+"""Потоковая выгрузка постов, комментариев, категорий и мест в NDJSON."""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import (
+    DEFAULT_CHUNK_SIZE, encode_stream, export_lines, parse_after_ids,
+    parse_models, parse_since)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает данные блога в NDJSON (по объекту dumpdata в строке), '
+        'при необходимости только новые строки и со сжатием gzip.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.')
+        parser.add_argument(
+            '--models',
+            help='Модели через запятую: category,location,post,comment.')
+        parser.add_argument(
+            '--since', help='Только строки с created_at не раньше даты.')
+        parser.add_argument(
+            '--after-id',
+            help='Только строки с id больше: post=123,comment=456 или одно '
+                 'число для одной модели.')
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать выгрузку gzip.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за раз.')
+
+    def handle(self, *args, output, since, after_id, chunk_size, **options):
+        try:
+            models = parse_models(options['models'])
+            since = parse_since(since)
+            after_ids = parse_after_ids(after_id, models)
+        except ValueError as error:
+            raise CommandError(error)
+        chunks = encode_stream(
+            export_lines(models, since, after_ids, chunk_size),
+            compress=options['gzip'])
+        if output is None:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(output, 'wb') as stream:
+            for chunk in chunks:
+                stream.write(chunk)
@@ -0,0 +1,211 @@
+"""Потоковая загрузка дампа блога (формат dumpdata, как db.json)."""
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers import base, python
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from blog import feed_cache, page_cache
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCHES_PER_TRANSACTION = 10
+READ_SIZE = 1 << 16
+# Каждая ступень — отдельный проход по файлу: ссылки внутри дампа
+# разрешаются, только когда их цели уже загружены.
+LOAD_STAGES = (
+    ('blog.category', 'blog.location'),
+    ('auth.user',),
+    ('blog.post',),
+    ('blog.comment',),
+)
+# На время загрузки жертвуем надёжностью записи ради скорости: при сбое
+# дамп просто загружается заново.
+LOAD_PRAGMAS = {
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144',
+}
+
+
+def _skip_separators(buffer, position):
+    while position < len(buffer) and (
+            buffer[position].isspace() or buffer[position] == ','):
+        position += 1
+    return position
+
+
+def iter_dump(stream, read_size=READ_SIZE):
+    """
+    Объекты JSON-массива по одному, без чтения файла целиком.
+
+    В памяти держится только текущий объект и недочитанный хвост буфера.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(read_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Дамп должен быть JSON-массивом.')
+    position = 1
+    eof = False
+    while True:
+        position = _skip_separators(buffer, position)
+        if buffer[position:position + 1] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError('Дамп оборван или повреждён.')
+            # Объект дочитается со следующим куском файла.
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+@contextmanager
+def keep_timestamps(models):
+    """
+    Не даём auto_now/auto_now_add перезаписать даты из дампа.
+
+    Возвращает отключённые поля по моделям: тем, которых нет в дампе,
+    загрузчик сам ставит текущее время.
+    """
+    saved = []
+    fields = {}
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(
+                    field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                fields.setdefault(model, []).append(field)
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+@contextmanager
+def relaxed_pragmas():
+    """Быстрые настройки SQLite на время загрузки."""
+    # synchronous нельзя менять внутри транзакции.
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        previous = {}
+        for name, value in LOAD_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name}')
+            previous[name] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {name} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for name, value in previous.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает дамп блога потоково: по ступеням зависимостей '
+        '(категории и места, пользователи, посты, комментарии), '
+        'через bulk_create порциями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dump', help='Путь к JSON-дампу.')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество объектов в одном bulk_create.')
+        parser.add_argument(
+            '--batches-per-transaction', type=int,
+            default=DEFAULT_BATCHES_PER_TRANSACTION,
+            help='Количество порций в одной транзакции.')
+
+    def handle(
+            self, *args, dump, batch_size, batches_per_transaction,
+            **options):
+        self.batch_size = batch_size
+        self.batches_per_transaction = batches_per_transaction
+        models = [
+            apps.get_model(label) for stage in LOAD_STAGES for label in stage
+        ]
+        with relaxed_pragmas(), keep_timestamps(models) as timestamps:
+            self.timestamp_fields = timestamps
+            for stage in LOAD_STAGES:
+                with open(dump, encoding='utf-8') as stream:
+                    loaded = self.load_stage(stream, set(stage))
+                for label in stage:
+                    self.stdout.write(f'{label}: {loaded[label]}')
+            self.reset_sequences(models)
+        self.refresh_denormalized()
+        self.stdout.write(self.style.SUCCESS('Дамп загружен.'))
+
+    def load_stage(self, stream, labels):
+        """Загружаем объекты ступени; ссылки на прошлые ступени готовы."""
+        loaded = dict.fromkeys(labels, 0)
+        items = (
+            item for item in iter_dump(stream) if item.get('model') in labels
+        )
+        try:
+            objects = python.Deserializer(items, ignorenonexistent=True)
+            while True:
+                with transaction.atomic():
+                    for _ in range(self.batches_per_transaction):
+                        batch = list(islice(objects, self.batch_size))
+                        if not batch:
+                            return loaded
+                        self.insert(batch, loaded)
+        except (base.DeserializationError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать дамп: {error}')
+        except IntegrityError as error:
+            # bulk_create не обновляет строки, в отличие от loaddata.
+            raise CommandError(
+                f'Дамп противоречит данным в базе ({error}); загрузчик '
+                'рассчитан на пустые таблицы.')
+
+    def insert(self, batch, loaded):
+        """Вставляем порцию; объекты одной модели — одним bulk_create."""
+        by_model = {}
+        for deserialized in batch:
+            by_model.setdefault(
+                deserialized.object.__class__, []).append(deserialized)
+        now = timezone.now()
+        for model, objects in by_model.items():
+            instances = [item.object for item in objects]
+            for field in self.timestamp_fields.get(model, ()):
+                for instance in instances:
+                    if getattr(instance, field.attname) is None:
+                        setattr(instance, field.attname, now)
+            model.objects.bulk_create(instances, batch_size=self.batch_size)
+            for item in objects:
+                for name, values in (item.m2m_data or {}).items():
+                    if values:
+                        getattr(item.object, name).set(values)
+            loaded[model._meta.label_lower] += len(objects)
+
+    def reset_sequences(self, models):
+        """Сдвигаем счётчики id за загруженные ключи (не нужно в SQLite)."""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def refresh_denormalized(self):
+        """bulk_create обходит save() и сигналы — досчитываем поля постов."""
+        Post.objects.refresh_visibility()
+        call_command('recount_comments', stdout=self.stdout)
+        feed_cache.bump(feed_cache.GLOBAL_SCOPE, page_cache.PAGE_SCOPE)
@@ -0,0 +1,16 @@
+"""Открытие отложенных публикаций."""
+from django.core.management.base import BaseCommand
+
+from blog.scheduler import publish_due_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Однократно открывает посты, чья дата публикации наступила. '
+        'Для постоянной работы используйте run_publication_scheduler.'
+    )
+
+    def handle(self, *args, **options):
+        published = publish_due_posts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Открыто публикаций: {len(published)}'))
@@ -0,0 +1,40 @@
+"""Пересчёт счётчиков комментариев у постов."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count порциями по первичному ключу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Количество постов, обновляемых в одной транзакции.')
+
+    def handle(self, *args, chunk_size, **options):
+        counts = (
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by().values('post').annotate(total=Count('pk'))
+            .values('total')
+        )
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                Post.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += Post.objects.filter(pk__in=ids).update(
+                    comment_count=Coalesce(Subquery(counts), 0))
+            last_id = ids[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано постов: {updated}'))
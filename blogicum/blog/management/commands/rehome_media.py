@@ -0,0 +1,81 @@
+"""Перенос картинок постов в хранилище по содержимому."""
+import posixpath
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog import page_cache, renditions
+from blog.models import Post
+from blog.storage import CONTENT_NAME_RE
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в шардированное дерево по хэшу '
+        'содержимого без остановки сайта: сначала копия, затем условное '
+        'переключение ссылки в посте; старые файлы удаляются по флагу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-old', action='store_true',
+            help='Удалять старые файлы, на которые больше нет ссылок.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Количество постов, обрабатываемых за раз.')
+
+    def rehome(self, post_id, name, metas):
+        """Копия по хэшу с новыми копиями-рендишенами; True, если перенесли."""
+        with default_storage.open(name) as source:
+            new_name = default_storage.save(name, source)
+        if new_name not in metas:
+            try:
+                metas[new_name] = renditions.make_renditions(new_name)
+            except OSError:
+                # Картинку не открыть — пусть выводится без копий.
+                metas[new_name] = {}
+        # Пока ссылка не переключена, читатели получают старый файл;
+        # если картинку успели сменить, пост не трогаем.
+        return Post.objects.filter(pk=post_id, image=name).update(
+            image=new_name, image_meta=metas[new_name],
+            updated_at=timezone.now())
+
+    def handle(self, *args, delete_old, chunk_size, **options):
+        queryset = (
+            Post.objects.exclude(image='')
+            .exclude(image__regex=CONTENT_NAME_RE.pattern)
+            .order_by('pk')
+        )
+        moved = missing = 0
+        last_id = 0
+        metas = {}
+        while True:
+            chunk = list(
+                queryset.filter(pk__gt=last_id)
+                .values_list('pk', 'image')[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            released = []
+            for post_id, name in chunk:
+                if posixpath.dirname(name) not in (
+                        settings.CONTENT_ADDRESSED_DIRS):
+                    continue
+                if not default_storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f'Пост {post_id}: нет файла {name}')
+                    continue
+                if self.rehome(post_id, name, metas):
+                    moved += 1
+                    released.append(name)
+            page_cache.invalidate()
+            if delete_old:
+                # Вместе со старым файлом уходят и копии по старому пути.
+                for name in released:
+                    renditions.release_image(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено картинок: {moved}, без файла: {missing}'))
@@ -0,0 +1,23 @@
+"""Воркер отложенных публикаций."""
+from django.core.management.base import BaseCommand
+
+from blog.scheduler import PublicationScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Долгоживущий воркер: открывает отложенные посты точно в их '
+        'pub_date и отправляет сигнал posts_published.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reload-interval', type=int, default=60,
+            help='Как часто (в секундах) перечитывать очередь из базы.')
+
+    def handle(self, *args, reload_interval, **options):
+        self.stdout.write('Планировщик публикаций запущен.')
+        try:
+            PublicationScheduler(reload_interval).run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Планировщик публикаций остановлен.')
@@ -0,0 +1,190 @@
+"""
+Отдача загруженных файлов (MEDIA_URL).
+
+Целый файл отдаётся через FileResponse: WSGI-сервер с wsgi.file_wrapper
+(gunicorn, uWSGI) пересылает его os.sendfile без копирования через Python.
+Поддерживаются запросы диапазона (Range, If-Range) и условные запросы
+(If-None-Match, If-Modified-Since). Файлы с хэшем содержимого в имени
+кэшируются навсегда. Если перед Django стоит nginx или Apache, файл можно
+отдать им целиком через X-Accel-Redirect или X-Sendfile
+(MEDIA_OFFLOAD_HEADER).
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_addressed
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class MediaResponse(FileResponse):
+    """FileResponse с крупными блоками на случай отдачи без sendfile."""
+
+    block_size = 1 << 16
+
+
+class FileRange:
+    """Файл, из которого читается только диапазон [start, start + length)."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Один диапазон из заголовка Range как (начало, длина).
+
+    None — заголовка нет или он не разобран (отдаём файл целиком),
+    False — диапазон за пределами файла (416). Несколько диапазонов
+    не поддерживаются: стандарт разрешает ответить целым файлом.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = min(int(last), size)
+        return (size - length, length) if length else False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end - start + 1
+
+
+def file_etag(path, stat):
+    """Хэш содержимого из имени, иначе время изменения и размер."""
+    if is_content_addressed(path):
+        return '"{}"'.format(posixpath.splitext(posixpath.basename(path))[0])
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def if_range_passes(request, etag, last_modified):
+    """Диапазон отдаётся, только если If-Range совпал с версией файла."""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def cache_headers(response, etag, last_modified, max_age, immutable=False):
+    """Валидаторы и Cache-Control ответа."""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(
+        response, public=True, max_age=max_age,
+        **({'immutable': True} if immutable else {}))
+    return response
+
+
+def offload(path, fullpath, content_type):
+    """Пустой ответ, который фронтенд-сервер заменит содержимым файла."""
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_OFFLOAD_HEADER == 'X-Accel-Redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_OFFLOAD_PREFIX + path)
+    else:
+        response['X-Sendfile'] = str(fullpath)
+    return response
+
+
+def file_response(request, fullpath, size, etag, last_modified, content_type):
+    """Файл целиком или запрошенный диапазон."""
+    requested = None
+    if if_range_passes(request, etag, last_modified):
+        requested = parse_range(request.META.get('HTTP_RANGE'), size)
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    file = fullpath.open('rb')
+    if requested is None:
+        response = MediaResponse(file, content_type=content_type)
+    else:
+        start, length = requested
+        response = MediaResponse(
+            FileRange(file, start, length), content_type=content_type,
+            status=206)
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{size}')
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_file(
+        request, fullpath, stat, etag, max_age, immutable=False,
+        content_type=None, encoding=None):
+    """Файл с условными запросами, диапазонами и заголовками кэширования."""
+    last_modified = int(stat.st_mtime)
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        if isinstance(conditional, HttpResponseNotModified):
+            cache_headers(
+                conditional, etag, last_modified, max_age, immutable)
+        return conditional
+    response = file_response(
+        request, fullpath, stat.st_size, etag, last_modified,
+        content_type or 'application/octet-stream')
+    if response.status_code == 416:
+        return response
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return cache_headers(response, etag, last_modified, max_age, immutable)
+
+
+@require_safe
+def serve(request, path):
+    """Отдаём файл из MEDIA_ROOT."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+        stat = fullpath.stat()
+    except (OSError, ValueError):
+        raise Http404('Файл не найден.')
+    if not fullpath.is_file():
+        raise Http404('Файл не найден.')
+    etag = file_etag(path, stat)
+    immutable = is_content_addressed(path)
+    max_age = (
+        IMMUTABLE_MAX_AGE if immutable else settings.MEDIA_CACHE_MAX_AGE)
+    content_type, encoding = mimetypes.guess_type(path)
+    if settings.MEDIA_OFFLOAD_HEADER:
+        # Условные запросы, Range и сжатие фронтенд-сервер обработает сам.
+        return cache_headers(
+            offload(
+                path, fullpath, content_type or 'application/octet-stream'),
+            etag,
+            int(stat.st_mtime), max_age, immutable)
+    return serve_file(
+        request, fullpath, stat, etag, max_age, immutable, content_type,
+        encoding)
@@ -0,0 +1,123 @@
+"""Промежуточные слои проекта."""
+import math
+import mimetypes
+import posixpath
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.sessions.middleware import (
+    SessionMiddleware as DjangoSessionMiddleware)
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .media import IMMUTABLE_MAX_AGE, file_etag, serve_file
+from .static_assets import COMPRESSIBLE_EXTENSIONS
+from .write_queue import WriteQueueBusy
+
+# Заранее сжатые копии в порядке предпочтения.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых (q=0)."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        try:
+            weight = float(params[2:]) if params.startswith('q=') else 1
+        except ValueError:
+            weight = 0
+        if weight > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware(MiddlewareMixin):
+    """
+    Отдаём собранную статику из STATIC_ROOT до остальных слоёв.
+
+    Выбирается сжатая копия по Accept-Encoding; файлы с хэшем в имени
+    (из манифеста collectstatic) кэшируются на год как immutable.
+    Файлы, которых нет в STATIC_ROOT, уходят дальше по цепочке.
+    MiddlewareMixin делает слой пригодным и для WSGI, и для ASGI.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.hashed = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def process_request(self, request):
+        if (self.root and request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            return self.serve(
+                request, request.path_info[len(self.prefix):])
+        return None
+
+    def serve(self, request, path):
+        path = posixpath.normpath(path).lstrip('/')
+        try:
+            fullpath = Path(safe_join(self.root, path))
+            stat = fullpath.stat()
+        except (OSError, ValueError, SuspiciousFileOperation):
+            return None
+        if not fullpath.is_file():
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        encoding = None
+        if path.endswith(COMPRESSIBLE_EXTENSIONS):
+            accepted = accepted_encodings(
+                request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            for coding, extension in ENCODINGS:
+                variant = fullpath.with_name(fullpath.name + extension)
+                if coding in accepted and variant.is_file():
+                    fullpath, stat, encoding = variant, variant.stat(), coding
+                    break
+        immutable = path in self.hashed
+        response = serve_file(
+            request, fullpath, stat, file_etag(path, stat),
+            IMMUTABLE_MAX_AGE if immutable else settings.STATIC_MAX_AGE,
+            immutable, content_type, encoding)
+        if path.endswith(COMPRESSIBLE_EXTENSIONS):
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+def write_queue_busy_response():
+    """Ответ 503 с Retry-After для переполненной очереди записи."""
+    response = HttpResponse(
+        'Сервер перегружен, повторите запрос позже.', status=503,
+        content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = math.ceil(settings.WRITE_QUEUE_TIMEOUT)
+    return response
+
+
+class WriteQueueBusyMiddleware(MiddlewareMixin):
+    """Переполненная очередь записи — ответ 503 с Retry-After, а не 500."""
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, WriteQueueBusy):
+            return None
+        return write_queue_busy_response()
+
+
+class SessionMiddleware(DjangoSessionMiddleware):
+    """
+    Сессии с ответом 503, если их запись не прошла через очередь.
+
+    Сессия сохраняется в process_response, уже после представления, и
+    process_exception других слоёв эту ошибку не видит.
+    """
+
+    def process_response(self, request, response):
+        try:
+            return super().process_response(request, response)
+        except WriteQueueBusy:
+            return write_queue_busy_response()
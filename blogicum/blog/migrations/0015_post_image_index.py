@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_image_meta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('image', ''), _negated=True), fields=['image'], name='post_image_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 """Модели."""
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -31,6 +33,8 @@ class Location(PublishedModel):
     name = models.CharField(
         max_length=MAX_TITLE_LENGTH,
         verbose_name="Название места")
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Изменено')
 
     class Meta:
         """Внутренний класс Meta модели."""
@@ -58,6 +62,8 @@ class Category(PublishedModel):
             "разрешены символы латиницы, цифры, дефис и подчёркивание."
         ),
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Изменено')
 
     class Meta:
         """Внутренний класс Meta модели."""
@@ -69,6 +75,52 @@ class Category(PublishedModel):
         """Магический метод."""
         return self.title[:MAX_TITLE_LENGTH]
 
+    def save(self, *args, **kwargs):
+        """Пересчитываем видимость постов, если сменился флаг публикации."""
+        with transaction.atomic():
+            flipped = not self._state.adding and Category.objects.filter(
+                pk=self.pk).exclude(is_published=self.is_published).exists()
+            super().save(*args, **kwargs)
+            if flipped:
+                self.posts.refresh_visibility()
+
+
+class PostQuerySet(models.QuerySet):
+    """Запросы к постам с поддержкой поля is_visible."""
+
+    def refresh_visibility(self, now=None):
+        """Пересчитываем is_visible одним UPDATE по выбранным постам."""
+        now = now or timezone.now()
+        category_published = Category.objects.filter(
+            pk=OuterRef('category_id'), is_published=True)
+        return self.update(is_visible=Case(
+            When(
+                Q(is_published=True, pub_date__lte=now)
+                & Exists(category_published),
+                then=Value(True)),
+            default=Value(False),
+        ))
+
+    def scheduled(self):
+        """Посты, которые откроются сами, когда наступит pub_date."""
+        return self.filter(
+            is_visible=False,
+            is_published=True,
+            category__is_published=True,
+        )
+
+    def publish_due(self, now=None):
+        """Открываем посты, чья дата публикации уже наступила."""
+        now = now or timezone.now()
+        ids = list(self.scheduled().filter(
+            pub_date__lte=now).values_list('pk', flat=True))
+        if ids:
+            # Условие повторяется целиком: пока шёл выбор, пост могли снять
+            # с публикации, перенести или открыть в другом процессе.
+            self.scheduled().filter(
+                pk__in=ids, pub_date__lte=now).update(is_visible=True)
+        return ids
+
 
 class Post(PublishedModel):
     """Модель Post."""
@@ -106,6 +158,28 @@ class Post(PublishedModel):
         verbose_name='Фото',
         upload_to='posts_images',
         blank=True)
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев')
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Изменено')
+    image_meta = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Данные изображения')
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Виден читателям',
+        help_text=(
+            'Опубликован, в опубликованной категории '
+            'и дата публикации наступила.'
+        ),
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         """Внутренний класс Meta модели."""
@@ -114,11 +188,50 @@ class Post(PublishedModel):
         verbose_name_plural = "Публикации"
         default_related_name = "posts"
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=True),
+                name='post_visible_feed_idx'),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_visible=True),
+                name='post_category_visible_idx'),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_feed_idx'),
+            models.Index(
+                fields=('author', 'pub_date'),
+                condition=models.Q(is_visible=True),
+                name='post_author_visible_idx'),
+            # Счётчик ссылок на файл в хранилище по содержимому.
+            models.Index(
+                fields=('image',),
+                condition=~models.Q(image=''),
+                name='post_image_idx'),
+        )
 
     def __str__(self):
         """Магический метод."""
         return self.title[:MAX_TITLE_LENGTH]
 
+    def compute_visibility(self, now=None):
+        """Виден ли пост читателям на момент now."""
+        return bool(
+            self.is_published
+            and self.category_id is not None
+            and self.category.is_published
+            and self.pub_date <= (now or timezone.now())
+        )
+
+    def save(self, *args, **kwargs):
+        """Сохраняем пост вместе с пересчитанным is_visible."""
+        self.is_visible = self.compute_visibility()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'is_visible'}
+        super().save(*args, **kwargs)
+
 
 class Comment(PublishedModel):
     """Модель Comment."""
@@ -143,6 +256,12 @@ class Comment(PublishedModel):
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
         ordering = ('created_at',)
+        indexes = [
+            # Порции комментариев поста по ключу (created_at, id).
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_thread_idx'),
+        ]
 
     def __str__(self):
         """Магический метод."""
@@ -0,0 +1,222 @@
+"""
+Кэш готовых HTML-страниц.
+
+Персональные куски страницы («дырки»: блок входа/выхода в шапке и форма
+комментария с CSRF-токеном) при записи в кэш заменяются метками
+``<!--hole:имя:{параметры}-->``. При каждой выдаче метки заполняются
+коротким вторым проходом для текущего посетителя, поэтому одна и та же
+закэшированная страница годится для всех.
+
+Ключ страницы — путь и параметры, которые читают представления: курсор
+и номер страницы в проверенном виде. Остальные параметры на страницу не
+влияют и в ключ не попадают, поэтому мусорные строки запроса не плодят
+копии страниц в кэше.
+"""
+import asyncio
+import hashlib
+import json
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe, urlencode
+
+from . import db_executor, feed_cache
+from .conditional import viewer_etag
+from .forms import CommentForm
+from .page_paginator import CURSOR_PARAM, decode_cursor, encode_cursor
+
+PAGE_SCOPE = 'pages'
+VALIDATOR_HEADERS = ('Last-Modified', 'Cache-Control')
+HOLE_RE = re.compile(r'<!--hole:(\w+):(\{[^<>]*\})-->')
+
+
+def _comment_form_context(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm()}
+
+
+HOLES = {
+    'header_user': ('includes/header_user.html', lambda request: {}),
+    'comment_form': ('includes/comment_form.html', _comment_form_context),
+}
+
+
+def is_capturing(request):
+    """Рендерится ли страница для записи в кэш."""
+    return getattr(request, 'page_cache_capture', False)
+
+
+def hole_marker(name, params):
+    """Метка на месте персонального куска страницы."""
+    return f'<!--hole:{name}:{json.dumps(params, sort_keys=True)}-->'
+
+
+def render_hole(name, request, params):
+    """Второй проход: рендерим кусок страницы для текущего посетителя."""
+    template_name, get_context = HOLES[name]
+    return get_template(template_name).render(
+        get_context(request, **params), request)
+
+
+def fill_holes(content, request):
+    """Заполняем все метки страницы."""
+    return HOLE_RE.sub(
+        lambda match: render_hole(
+            match[1], request, json.loads(match[2])),
+        content)
+
+
+def invalidate():
+    """Сбрасываем все закэшированные страницы."""
+    feed_cache.bump(PAGE_SCOPE)
+
+
+def _conditional_response(request, response):
+    """Ответ 304 по сохранённым валидаторам, если копия клиента свежа."""
+    if not response.has_header('ETag'):
+        return None
+    last_modified = response.get('Last-Modified')
+    not_modified = get_conditional_response(
+        request,
+        etag=response['ETag'],
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+        response=response,
+    )
+    if not_modified is response:
+        return None
+    patch_vary_headers(not_modified, ('Cookie',))
+    return not_modified
+
+
+def _is_cacheable(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def _page_query(request):
+    """
+    Параметры страницы в том виде, в каком их поймёт пагинатор.
+
+    Испорченный курсор и нечисловой номер дают первую страницу — как и
+    без параметра; номер меньше единицы — последнюю. Номер читается только
+    при постраничной навигации по номерам.
+    """
+    params = {}
+    decoded = decode_cursor(request.GET.get(CURSOR_PARAM) or '')
+    if decoded:
+        params[CURSOR_PARAM] = encode_cursor(*decoded)
+    if settings.KEYSET_PAGINATION:
+        return urlencode(params)
+    try:
+        number = int(request.GET.get('page') or 1)
+    except ValueError:
+        number = 1
+    if number != 1:
+        params['page'] = number if number > 1 else 'last'
+    return urlencode(params)
+
+
+def _lookup(request):
+    """Ключ страницы и готовый ответ из кэша (или 304), если он есть."""
+    path = hashlib.md5(
+        f'{request.path}?{_page_query(request)}'.encode()).hexdigest()
+    key = f'page:{feed_cache.get_version(PAGE_SCOPE)}:{path}'
+    entry = cache.get(key)
+    if entry is None:
+        return key, None, None
+    response = HttpResponse(content_type=entry['content_type'])
+    for header, value in entry['headers'].items():
+        response[header] = value
+    if entry.get('etag'):
+        response['ETag'] = viewer_etag(request, entry['etag'])
+    not_modified = _conditional_response(request, response)
+    if not_modified is not None:
+        return key, not_modified, None
+    return key, response, entry['content']
+
+
+def _store(key, response):
+    """Кладём HTML-ответ в кэш; None — ответ отдаётся как есть."""
+    if response.streaming or not response.get(
+            'Content-Type', '').startswith('text/html'):
+        return None
+    content = response.content.decode(response.charset)
+    if _is_cacheable(response):
+        cache.set(key, {
+            'content': content,
+            'content_type': response['Content-Type'],
+            'headers': {
+                header: response[header]
+                for header in VALIDATOR_HEADERS
+                if response.has_header(header)
+            },
+            # ETag без посетителя: его добавляет _lookup при выдаче.
+            'etag': getattr(response, 'base_etag', None),
+        }, settings.PAGE_CACHE_TIMEOUT)
+    return content
+
+
+def _finish(response, content, request):
+    """Заполняем «дырки» для текущего посетителя."""
+    response.content = fill_holes(content, request)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def _bypass(request, anonymous_only):
+    return request.method != 'GET' or (
+        anonymous_only and request.user.is_authenticated)
+
+
+def cache_page_for_visitors(anonymous_only=False):
+    """
+    Кэшируем GET-ответ представления целиком.
+
+    anonymous_only — для страниц, где кроме «дырок» есть и другие
+    персональные части (кнопки автора, посты владельца профиля).
+    Подходит и для асинхронных представлений: обращения к кэшу, сессии
+    и второй проход по «дыркам» идут через db_executor.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            return _async_wrapper(view, anonymous_only)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if _bypass(request, anonymous_only):
+                return view(request, *args, **kwargs)
+            key, response, content = _lookup(request)
+            if response is None:
+                request.page_cache_capture = True
+                try:
+                    response = view(request, *args, **kwargs)
+                finally:
+                    request.page_cache_capture = False
+                content = _store(key, response)
+            if content is None:
+                return response
+            return _finish(response, content, request)
+        return wrapper
+    return decorator
+
+
+def _async_wrapper(view, anonymous_only):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if await db_executor.run(_bypass, request, anonymous_only):
+            return await view(request, *args, **kwargs)
+        key, response, content = await db_executor.run(_lookup, request)
+        if response is None:
+            request.page_cache_capture = True
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                request.page_cache_capture = False
+            content = await db_executor.run(_store, key, response)
+        if content is None:
+            return response
+        return await db_executor.run(_finish, response, content, request)
+    return wrapper
@@ -1,11 +1,213 @@
 """Пагинатор."""
-from django.core.paginator import Paginator
+import binascii
+import json
+import math
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_PARAM = 'cursor'
+POSTS_ORDERING = ('-pub_date', '-id')
+COMMENTS_ORDERING = ('created_at', 'id')
+
+NEXT = 'n'
+PREVIOUS = 'p'
+MAX_CURSOR_INT = 2 ** 63 - 1
+
+
+def encode_cursor(direction, values):
+    """Упаковываем направление и значения ключа в непрозрачную строку."""
+    payload = json.dumps([direction, values], separators=(',', ':'))
+    return urlsafe_base64_encode(force_bytes(payload))
+
+
+def decode_cursor(cursor):
+    """Распаковываем курсор; для испорченной строки возвращаем None."""
+    try:
+        direction, values = json.loads(force_str(
+            urlsafe_base64_decode(cursor)))
+    except (binascii.Error, TypeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        return None
+    if not all(_is_key_value(value) for value in values):
+        return None
+    return direction, values
+
+
+def _is_key_value(value):
+    """Ключ сортировки в курсоре — строка или конечное число без None."""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return abs(value) <= MAX_CURSOR_INT
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, str)
+
+
+def cursor_values(obj, ordering):
+    """Значения полей сортировки объекта или строки в JSON-виде."""
+    values = []
+    for field in ordering:
+        name = field.lstrip('-')
+        value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+        values.append(
+            value.isoformat() if hasattr(value, 'isoformat') else value)
+    return values
+
+
+class CursorPage:
+    """Страница курсорной (keyset) пагинации."""
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
 
+    def __iter__(self):
+        return iter(self.object_list)
 
-def page_paginator(queryset, request):
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page or not self.object_list:
+            return None
+        return encode_cursor(
+            NEXT, cursor_values(self.object_list[-1], self.ordering))
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous_page or not self.object_list:
+            return None
+        return encode_cursor(
+            PREVIOUS, cursor_values(self.object_list[0], self.ordering))
+
+
+class KeysetPaginator:
+    """
+    Пагинатор по ключу сортировки вместо OFFSET.
+
+    Каждая страница выбирается запросом вида
+    ``WHERE (pub_date, id) < (:pub_date, :id) ORDER BY ... LIMIT n + 1``,
+    поэтому стоимость не зависит от номера страницы, а COUNT(*) не нужен.
+    Последнее поле сортировки должно быть уникальным.
+    """
+
+    def __init__(self, queryset, per_page, ordering=POSTS_ORDERING):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def _to_python(self, values):
+        """Приводим значения из курсора к типам полей модели."""
+        opts = self.queryset.model._meta
+        return [
+            opts.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(self.ordering, values)
+        ]
+
+    def parse_cursor(self, cursor):
+        """Направление и значения ключа; (None, None) для неверного курсора."""
+        decoded = decode_cursor(cursor) if cursor else None
+        if not decoded or len(decoded[1]) != len(self.ordering):
+            return None, None
+        direction, values = decoded
+        try:
+            values = self._to_python(values)
+        except (ValidationError, TypeError, ValueError):
+            return None, None
+        # Пустая строка у даты превращается в None, а по None не сравнить.
+        if any(value is None for value in values):
+            return None, None
+        return direction, values
+
+    def _seek(self, values, forward):
+        """Условие «строго после ключа» для лексикографической сортировки."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def page_queryset(self, cursor=None):
+        """
+        Запрос строк страницы с лишней строкой для признака продолжения.
+
+        Возвращает направление курсора (None для первой страницы) и срез
+        на per_page + 1 строк; для PREVIOUS строки идут в обратном порядке.
+        Неверный курсор ведёт на первую страницу.
+        """
+        direction, values = self.parse_cursor(cursor)
+        if direction == PREVIOUS:
+            reverse = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in self.ordering
+            ]
+            queryset = self.queryset.filter(
+                self._seek(values, forward=False)).order_by(*reverse)
+        else:
+            queryset = self.queryset.order_by(*self.ordering)
+            if direction == NEXT:
+                queryset = queryset.filter(self._seek(values, forward=True))
+        return direction, queryset[:self.per_page + 1]
+
+    def get_page(self, cursor=None):
+        """Возвращаем страницу; неверный курсор ведёт на первую страницу."""
+        direction, queryset = self.page_queryset(cursor)
+        object_list = list(queryset)
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == PREVIOUS:
+            object_list.reverse()
+            return CursorPage(object_list, self.ordering, True, has_more)
+        return CursorPage(
+            object_list, self.ordering, has_more, direction == NEXT)
+
+
+def page_paginator(queryset, request, ordering=POSTS_ORDERING):
     """Пагинатор."""
+    if settings.KEYSET_PAGINATION:
+        paginator = KeysetPaginator(
+            queryset, settings.ITEMS_PER_PAGE, ordering)
+        page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
+        return {'page_obj': page_obj}
     paginator = Paginator(queryset, settings.ITEMS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {'page_obj': page_obj}
+
+
+def comments_paginator(queryset, request):
+    """Порция комментариев поста, от старых к новым."""
+    paginator = KeysetPaginator(
+        queryset, settings.COMMENTS_PER_PAGE, COMMENTS_ORDERING)
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))
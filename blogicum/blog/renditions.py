@@ -0,0 +1,245 @@
+"""
+Уменьшенные копии (рендишены) картинок постов.
+
+Для каждого вида (карточка в ленте, страница поста) строятся копии
+нескольких ширин в WebP и в запасном формате (JPEG, для прозрачных
+картинок — PNG). Размеры, формат, объём и хэш оригинала вместе со
+списком готовых копий хранятся в ``Post.image_meta``, поэтому шаблону не
+нужно открывать файлы. Пока копий нет, выводится оригинал.
+"""
+import hashlib
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import page_cache
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Ширины копий: обычный экран и экран с двойной плотностью пикселей.
+RENDITION_WIDTHS = {
+    'card': (640, 1280),
+    'detail': (960, 1920),
+}
+# Ширина, которую картинка занимает на странице, для атрибута sizes.
+RENDITION_SIZES = {
+    'card': '(max-width: 40rem) 100vw, 40rem',
+    'detail': '(max-width: 40rem) 100vw, 40rem',
+}
+RENDITIONS_DIR = 'renditions'
+WEBP = 'webp'
+FALLBACK = 'fallback'
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+EXIF_ORIENTATION = 0x0112
+# Значения Orientation, при которых ширина и высота меняются местами.
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+_executor = None
+
+
+def rendition_name(image_name, width, image_format):
+    """Путь копии в хранилище рядом с остальными копиями."""
+    stem = posixpath.splitext(image_name)[0]
+    return posixpath.join(
+        RENDITIONS_DIR, f'{stem}-{width}w.{EXTENSIONS[image_format]}')
+
+
+def _fallback_format(image):
+    return 'PNG' if image.mode in ('RGBA', 'LA', 'P') else 'JPEG'
+
+
+def _save(image, name, image_format, storage):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, image_format, **SAVE_OPTIONS[image_format])
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def image_metadata(file):
+    """
+    Размеры с учётом поворота из EXIF, формат, объём и sha256 файла.
+
+    Пиксели не декодируются: Pillow читает только заголовок.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks() if hasattr(file, 'chunks') else iter(
+            lambda: file.read(1 << 16), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        image_format = image.format
+        if image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+    file.seek(0)
+    return {
+        'width': width,
+        'height': height,
+        'size': size,
+        'format': image_format,
+        'sha256': digest.hexdigest(),
+    }
+
+
+def prepare_image(post):
+    """
+    Сохраняем новую картинку поста в хранилище и читаем её данные.
+
+    Вызывается до записи строки: запись файла и хеширование не должны
+    занимать поток-писатель (см. write_queue).
+    """
+    image = post.image
+    if image and not image._committed:
+        image.save(image.name, image.file, save=False)
+        post.image_meta = image_metadata(image)
+        post._prepared_image = image.name
+
+
+def make_renditions(image_name, storage=default_storage):
+    """
+    Строим все копии картинки и возвращаем данные для image_meta.
+
+    Копии: ``{вид: {'webp': [[ширина, путь], ...], 'fallback': [...]}}``
+    в ключе ``renditions``. Копии шире оригинала не делаются.
+    """
+    with storage.open(image_name) as source:
+        meta = image_metadata(source)
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    fallback = _fallback_format(original)
+    renditions = {}
+    for kind, widths in RENDITION_WIDTHS.items():
+        variants = {WEBP: [], FALLBACK: []}
+        for width in sorted({min(width, original.width) for width in widths}):
+            image = original
+            if width < original.width:
+                height = round(original.height * width / original.width)
+                image = original.resize(
+                    (width, height), Image.Resampling.LANCZOS)
+            for key, image_format in ((WEBP, 'WEBP'), (FALLBACK, fallback)):
+                name = rendition_name(image_name, width, image_format)
+                variants[key].append(
+                    [width, _save(image, name, image_format, storage)])
+        renditions[kind] = variants
+    return {**meta, 'renditions': renditions}
+
+
+def release_image(image_name, storage=default_storage):
+    """
+    Удаляем картинку и её копии, если на неё больше не ссылается ни один пост.
+
+    Одинаковые загрузки хранятся одним файлом, поэтому число ссылок — это
+    число постов с таким именем картинки (по индексу post_image_idx).
+    Недавно сохранённый или повторно использованный файл может ждать
+    ссылки из незавершённой транзакции — его удаление откладывается.
+    """
+    if not image_name:
+        return False
+    lock = getattr(storage, 'content_lock', None)
+    with lock(image_name) if lock else nullcontext():
+        if Post.objects.filter(image=image_name).exists():
+            return False
+        if getattr(storage, 'recently_touched', lambda name: False)(
+                image_name):
+            release_later(image_name, storage)
+            return False
+        release_renditions(image_name, storage)
+        storage.delete(image_name)
+    return True
+
+
+def release_renditions(image_name, storage=default_storage):
+    """Удаляем все копии картинки, в том числе не записанные в пост."""
+    directory, prefix = posixpath.split(
+        posixpath.join(RENDITIONS_DIR, posixpath.splitext(image_name)[0]))
+    if storage.exists(directory):
+        for name in storage.listdir(directory)[1]:
+            if name.startswith(f'{prefix}-'):
+                storage.delete(posixpath.join(directory, name))
+
+
+def release_later(image_name, storage=default_storage):
+    """Повторяем удаление, когда отсрочка истечёт."""
+    def release():
+        try:
+            release_image(image_name, storage)
+        except Exception:
+            logger.exception('Не удалось удалить картинку %s', image_name)
+        finally:
+            connection.close()
+
+    timer = threading.Timer(settings.CONTENT_RELEASE_GRACE, release)
+    timer.daemon = True
+    timer.start()
+
+
+def store_renditions(post_id, image_name, image_meta):
+    """Записываем копии в пост, если картинка за это время не сменилась."""
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        image_meta=image_meta, updated_at=timezone.now())
+    if updated:
+        page_cache.invalidate()
+    return updated
+
+
+def build_post_renditions(post_id, image_name):
+    """Задача пула: строим копии картинки поста."""
+    try:
+        store_renditions(post_id, image_name, make_renditions(image_name))
+    except Exception:
+        logger.exception(
+            'Не удалось построить копии картинки %s поста %s',
+            image_name, post_id)
+    finally:
+        # У потока пула своё соединение с базой.
+        connection.close()
+
+
+def get_executor():
+    """Общий пул потоков для построения копий."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RENDITION_WORKERS,
+            thread_name_prefix='renditions')
+    return _executor
+
+
+def schedule_renditions(post):
+    """
+    После коммита отдаём построение копий пулу.
+
+    При ``RENDITION_WORKERS = 0`` копии строятся сразу в текущем потоке.
+    """
+    post_id, image_name = post.pk, post.image.name
+
+    def submit():
+        if settings.RENDITION_WORKERS:
+            get_executor().submit(build_post_renditions, post_id, image_name)
+        else:
+            store_renditions(
+                post_id, image_name, make_renditions(image_name))
+
+    transaction.on_commit(submit)
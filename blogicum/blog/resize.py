@@ -0,0 +1,211 @@
+"""
+Картинки нужного размера по запросу: /media/r/<ширина>x<высота>/<путь>.
+
+Размер должен быть в RESIZE_SIZES — так шаблоны получают копии под свои
+рамки, а запросы других размеров не нагружают сервер.
+
+Копия строится Pillow при первом запросе и кладётся в MEDIA_ROOT/r/ по
+тому же пути, что и URL, так что дальше её отдаёт media.serve (а при
+желании и nginx напрямую). Объём кэша ограничен RESIZE_CACHE_MAX_BYTES:
+при переполнении удаляются давно не запрошенные копии (время доступа
+обновляется при отдаче). Одновременные запросы одной копии ждут друг друга,
+и строит её только первый: внутри процесса — через блокировку потока,
+между процессами — через flock на файле-замке.
+"""
+import os
+import posixpath
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import media
+from .renditions import SAVE_OPTIONS
+
+try:
+    import fcntl
+except ImportError:  # Windows: только блокировки внутри процесса.
+    fcntl = None
+
+RESIZE_DIR = 'r'
+LOCKS_DIR = '.locks'
+LOCK_STRIPES = 64
+# После переполнения кэш чистится до этой доли от предела.
+LOW_WATERMARK = 0.9
+# Время доступа обновляется не чаще, чем раз в столько секунд.
+TOUCH_INTERVAL = 60
+FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+
+_thread_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+_accounting_lock = threading.Lock()
+# Занятый кэшем объём по корням кэша; считается при первой записи.
+_cache_bytes = {}
+
+
+def cache_root():
+    return Path(settings.MEDIA_ROOT) / RESIZE_DIR
+
+
+def resized_name(width, height, name):
+    """Путь копии относительно MEDIA_ROOT (он же хвост URL)."""
+    return posixpath.join(RESIZE_DIR, f'{width}x{height}', name)
+
+
+def resize_image(image, width, height):
+    """
+    Уменьшаем картинку под рамку.
+
+    Заданы обе стороны — кадрируем по центру до нужных пропорций (карточки
+    для соцсетей), одна сторона 0 — вписываем с сохранением пропорций.
+    Картинка не увеличивается.
+    """
+    image = ImageOps.exif_transpose(image)
+    if width and height:
+        scale = min(1, image.width / width, image.height / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    image = image.copy()
+    image.thumbnail(
+        (width or image.width, height or image.height),
+        Image.Resampling.LANCZOS)
+    return image
+
+
+def render(source, width, height):
+    """Байты копии в формате оригинала."""
+    with Image.open(source) as image:
+        image_format = image.format
+        if image_format not in FORMATS:
+            raise UnidentifiedImageError(image_format)
+        # JPEG сразу декодируется в уменьшенном масштабе; квадрат по
+        # большей стороне годится и для повёрнутых по EXIF картинок.
+        side = max(width, height)
+        image.draft('RGB', (side, side))
+        resized = resize_image(image, width, height)
+    if image_format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    buffer = BytesIO()
+    resized.save(buffer, image_format, **SAVE_OPTIONS.get(image_format, {}))
+    return buffer.getvalue()
+
+
+@contextmanager
+def coalesce(name):
+    """Один построитель копии на имя: в потоках и в процессах."""
+    stripe = zlib.crc32(name.encode()) % LOCK_STRIPES
+    with _thread_locks[stripe]:
+        if fcntl is None:
+            yield
+            return
+        locks = cache_root() / LOCKS_DIR
+        locks.mkdir(parents=True, exist_ok=True)
+        with open(locks / f'{stripe}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _fresh(target, source_mtime):
+    """Копия есть и не старше оригинала; заодно отмечаем доступ."""
+    try:
+        stat = target.stat()
+    except FileNotFoundError:
+        return False
+    if stat.st_mtime < source_mtime:
+        return False
+    now = time.time()
+    if now - stat.st_atime > TOUCH_INTERVAL:
+        # Время изменения не трогаем: от него зависят ETag и Last-Modified.
+        os.utime(target, (now, stat.st_mtime))
+    return True
+
+
+def _cached_files(root):
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [name for name in dirs if name != LOCKS_DIR]
+        for name in files:
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield stat.st_atime, stat.st_size, path
+
+
+def evict(limit, root=None):
+    """Удаляем давно не запрошенные копии, пока кэш больше limit байт."""
+    files = sorted(_cached_files(root or cache_root()))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def account(size):
+    """Учитываем новую копию и чистим кэш при переполнении."""
+    root = cache_root()
+    limit = settings.RESIZE_CACHE_MAX_BYTES
+    with _accounting_lock:
+        if root in _cache_bytes:
+            _cache_bytes[root] += size
+        else:
+            _cache_bytes[root] = sum(
+                size for _, size, _ in _cached_files(root))
+        if _cache_bytes[root] > limit:
+            _cache_bytes[root] = evict(limit * LOW_WATERMARK, root)
+
+
+def ensure_resized(name, width, height):
+    """Строим копию, если её нет или оригинал новее; возвращаем её путь."""
+    cached = resized_name(width, height, name)
+    source = Path(safe_join(settings.MEDIA_ROOT, name))
+    target = Path(safe_join(settings.MEDIA_ROOT, cached))
+    source_mtime = source.stat().st_mtime
+    if _fresh(target, source_mtime):
+        return cached
+    with coalesce(cached):
+        # Пока ждали замок, копию мог построить другой запрос.
+        if _fresh(target, source_mtime):
+            return cached
+        data = render(source, width, height)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(f'{target.name}.{uuid.uuid4().hex}.tmp')
+        temporary.write_bytes(data)
+        os.replace(temporary, target)
+    account(len(data))
+    return cached
+
+
+@require_safe
+def resized(request, width, height, path):
+    """Отдаём копию картинки из MEDIA_ROOT нужного размера."""
+    path = posixpath.normpath(path).lstrip('/')
+    if ((width, height) not in settings.RESIZE_SIZES
+            or path.split('/', 1)[0] == RESIZE_DIR):
+        raise Http404('Такого размера нет.')
+    try:
+        cached = ensure_resized(path, width, height)
+    except (OSError, SuspiciousFileOperation, Image.DecompressionBombError):
+        # UnidentifiedImageError — тоже OSError.
+        raise Http404('Картинка не найдена.')
+    return media.serve(request, cached)
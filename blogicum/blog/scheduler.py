@@ -0,0 +1,71 @@
+"""Планировщик отложенных публикаций."""
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Post
+from .signals import posts_published
+
+logger = logging.getLogger(__name__)
+
+
+def publish_due_posts(now=None):
+    """Открываем наступившие публикации и сообщаем об этом сигналом."""
+    ids = Post.objects.publish_due(now)
+    if ids:
+        posts_published.send(sender=Post, post_ids=ids)
+    return ids
+
+
+class PublicationScheduler:
+    """
+    Очередь ближайших дат публикации.
+
+    Куча (pub_date, id) нужна только для того, чтобы проснуться точно
+    к следующей дате; открывает посты всегда publish_due_posts, поэтому
+    пропущенные и отредактированные посты подхватываются при пробуждении.
+    Очередь перечитывается из базы раз в reload_interval секунд.
+    """
+
+    def __init__(self, reload_interval=60, clock=timezone.now):
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self.queue = []
+        self.reloaded_at = None
+
+    def reload(self, now):
+        """Заполняем кучу постами, которые откроются до следующей загрузки."""
+        horizon = now + timedelta(seconds=self.reload_interval)
+        self.queue = list(
+            Post.objects.scheduled()
+            .filter(pub_date__gt=now, pub_date__lte=horizon)
+            .values_list('pub_date', 'pk')
+        )
+        heapq.heapify(self.queue)
+        self.reloaded_at = now
+
+    def tick(self):
+        """Открываем наступившие посты; возвращаем паузу до следующего шага."""
+        now = self.clock()
+        if self.queue and self.queue[0][0] <= now:
+            while self.queue and self.queue[0][0] <= now:
+                heapq.heappop(self.queue)
+            ids = publish_due_posts(now)
+            logger.info('Открыты публикации: %s', ids)
+        if (self.reloaded_at is None or (now - self.reloaded_at)
+                .total_seconds() >= self.reload_interval):
+            publish_due_posts(now)
+            self.reload(now)
+        wakeup = self.reloaded_at + timedelta(
+            seconds=self.reload_interval)
+        if self.queue:
+            wakeup = min(wakeup, self.queue[0][0])
+        return max((wakeup - now).total_seconds(), 0)
+
+    def run_forever(self, sleep=time.sleep):
+        """Основной цикл воркера."""
+        while True:
+            sleep(self.tick())
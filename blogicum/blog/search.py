@@ -0,0 +1,162 @@
+"""
+Полнотекстовый поиск по постам.
+
+Индекс — таблица FTS5 ``blog_post_search`` с внешним содержимым
+``blog_post``; её синхронизируют триггеры из миграции 0013. SQLite
+пересоздаёт ``blog_post`` при добавлении колонки, и триггеры пропадают,
+поэтому после каждой миграции они восстанавливаются. Запрос
+выбирает из индекса id одной страницы, отсортированные по bm25, сразу
+с условием видимости поста, а сами посты читаются одним ``in_bulk``.
+"""
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .page_paginator import (
+    CURSOR_PARAM, NEXT, PREVIOUS, CursorPage, decode_cursor)
+from .posts_queryset import posts_queryset
+
+SEARCH_PARAM = 'q'
+SEARCH_ORDERING = ('rank', 'id')
+# Совпадение в заголовке весит больше, чем в тексте.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+
+HITS_SQL = """
+    SELECT post.id, hit.rank
+    FROM (
+        SELECT rowid, bm25(blog_post_search, %s, %s) AS rank
+        FROM blog_post_search
+        WHERE blog_post_search MATCH %s
+    ) AS hit
+    JOIN blog_post AS post ON post.id = hit.rowid
+    WHERE post.is_visible {seek}
+    ORDER BY hit.rank {order}, post.id {order}
+    LIMIT %s
+"""
+
+SEARCH_TRIGGERS = {
+    'blog_post_search_insert': """
+        CREATE TRIGGER blog_post_search_insert AFTER INSERT ON blog_post
+        BEGIN
+            INSERT INTO blog_post_search(rowid, title, text)
+            VALUES (new.id, new.title, new.text);
+        END
+    """,
+    'blog_post_search_delete': """
+        CREATE TRIGGER blog_post_search_delete AFTER DELETE ON blog_post
+        BEGIN
+            INSERT INTO blog_post_search(blog_post_search, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+        END
+    """,
+    'blog_post_search_update': """
+        CREATE TRIGGER blog_post_search_update
+        AFTER UPDATE OF title, text ON blog_post
+        BEGIN
+            INSERT INTO blog_post_search(blog_post_search, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+            INSERT INTO blog_post_search(rowid, title, text)
+            VALUES (new.id, new.title, new.text);
+        END
+    """,
+}
+
+
+def ensure_search_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Восстанавливаем пропавшие триггеры индекса (обработчик post_migrate).
+
+    Если триггеров не было, индекс мог отстать, поэтому он перестраивается.
+    """
+    database = connections[using]
+    if database.vendor != 'sqlite':
+        return
+    with database.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, type FROM sqlite_master WHERE name LIKE %s",
+            ['blog_post_search%'])
+        existing = dict(cursor.fetchall())
+        if existing.get('blog_post_search') != 'table':
+            return
+        missing = [name for name in SEARCH_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(SEARCH_TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                "INSERT INTO blog_post_search(blog_post_search)"
+                " VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """
+    Переводим строку посетителя в выражение MATCH.
+
+    Каждое слово берётся в кавычки, поэтому синтаксис FTS5 (OR, NEAR,
+    звёздочки) во вводе не срабатывает; слова объединяются через AND.
+    Поиск по префиксу заменяет стемминг: «ежик» находит и «ежика».
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def _hits(expression, limit, seek=None, forward=True):
+    order = 'ASC' if forward else 'DESC'
+    params = [TITLE_WEIGHT, TEXT_WEIGHT, expression]
+    condition = ''
+    if seek is not None:
+        sign = '>' if forward else '<'
+        condition = (
+            f'AND (hit.rank {sign} %s'
+            f' OR (hit.rank = %s AND post.id {sign} %s))'
+        )
+        rank, pk = seek
+        params += [rank, rank, pk]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            HITS_SQL.format(seek=condition, order=order), [*params, limit])
+        return cursor.fetchall()
+
+
+def _seek_values(cursor):
+    decoded = decode_cursor(cursor) if cursor else None
+    if not decoded or len(decoded[1]) != len(SEARCH_ORDERING):
+        return None, None
+    direction, (rank, pk) = decoded
+    if not isinstance(rank, (int, float)) or not isinstance(pk, int):
+        return None, None
+    return direction, (rank, pk)
+
+
+def search_posts(query, cursor=None, per_page=None):
+    """Страница результатов поиска, от самых релевантных постов."""
+    per_page = per_page or settings.ITEMS_PER_PAGE
+    expression = match_expression(query)
+    if not expression:
+        return CursorPage([], SEARCH_ORDERING, False, False)
+    direction, seek = _seek_values(cursor)
+    hits = _hits(
+        expression, per_page + 1, seek, forward=direction != PREVIOUS)
+    has_more = len(hits) > per_page
+    hits = hits[:per_page]
+    if direction == PREVIOUS:
+        hits.reverse()
+    posts = posts_queryset(hide=True).in_bulk([pk for pk, _ in hits])
+    object_list = []
+    for pk, rank in hits:
+        if pk in posts:
+            posts[pk].rank = rank
+            object_list.append(posts[pk])
+    if direction == PREVIOUS:
+        return CursorPage(object_list, SEARCH_ORDERING, True, has_more)
+    return CursorPage(
+        object_list, SEARCH_ORDERING, has_more, direction == NEXT)
+
+
+def search_paginator(request):
+    """Контекст страницы поиска."""
+    query = request.GET.get(SEARCH_PARAM, '').strip()
+    return {
+        'query': query,
+        'page_obj': search_posts(query, request.GET.get(CURSOR_PARAM)),
+    }
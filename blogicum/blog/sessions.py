@@ -0,0 +1,12 @@
+"""Сессии в базе с записью через очередь писателя."""
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+
+from . import write_queue
+
+
+class SessionStore(DBSessionStore):
+
+    def save(self, must_create=False):
+        # Сессия пишется на каждом входе и почти каждом POST — это
+        # основная часть мелких записей, которые сталкиваются в SQLite.
+        write_queue.run(super().save, must_create)
@@ -0,0 +1,177 @@
+"""Обработчики сигналов моделей блога."""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import feed_cache, page_cache, renditions
+from .models import Category, Comment, Location, Post
+
+# Отправляется планировщиком, когда у постов наступила дата публикации;
+# аргумент post_ids — список открытых постов.
+posts_published = Signal()
+
+
+def change_comment_count(post_id, delta):
+    """Сдвигаем счётчик комментариев поста одним UPDATE."""
+    if post_id is None:
+        return
+    # Комментарии из фикстур (raw) не учитываются, поэтому не уходим в минус.
+    Post.objects.filter(pk=post_id, comment_count__gte=-delta).update(
+        comment_count=F('comment_count') + delta, updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw, **kwargs):
+    """Запоминаем исходный пост комментария перед редактированием."""
+    instance._previous_post_id = None
+    if not instance._state.adding and not raw:
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list('post_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    """Учитываем новый, перенесённый или изменённый комментарий."""
+    if raw:
+        return
+    if created:
+        change_comment_count(instance.post_id, 1)
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id not in (None, instance.post_id):
+        change_comment_count(previous_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+    else:
+        # Правка текста меняет страницу поста — сдвигаем его валидаторы.
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Уменьшаем счётчик после удаления комментария."""
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(pre_delete, sender=Category)
+def hide_orphaned_posts(sender, instance, **kwargs):
+    """Скрываем посты, которые останутся без категории (SET_NULL)."""
+    instance.posts.update(is_visible=False)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feeds(sender, instance, raw, **kwargs):
+    """Запоминаем ленты поста до редактирования и замечаем смену картинки."""
+    instance._previous_feeds = None
+    previous_image = ''
+    if not instance._state.adding and not raw:
+        previous = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('category__slug', 'author_id', 'image').first()
+        )
+        if previous:
+            *instance._previous_feeds, previous_image = previous
+    instance._image_changed = (
+        not raw and (instance.image.name or '') != (previous_image or ''))
+    instance._released_image = previous_image if (
+        instance._image_changed) else None
+    if instance._image_changed and getattr(
+            instance, '_prepared_image', None) != instance.image.name:
+        # Копии старой картинки больше не подходят; данные новой
+        # картинки читаются сразу, копии построит пул.
+        instance.image_meta = {}
+        if instance.image:
+            try:
+                instance.image_meta = renditions.image_metadata(
+                    instance.image)
+            except OSError:
+                # Файла уже нет: например, пост удалили вместе с последней
+                # ссылкой на картинку и сохраняют заново.
+                pass
+
+
+@receiver(post_save, sender=Post)
+def build_image_renditions(sender, instance, raw, **kwargs):
+    """Отдаём пулу построение копий новой картинки."""
+    if not raw and instance.image_meta and getattr(
+            instance, '_image_changed', False):
+        renditions.schedule_renditions(instance)
+
+
+def release_after_commit(image_name):
+    """После коммита удаляем файл, если на него не осталось ссылок."""
+    transaction.on_commit(lambda: renditions.release_image(image_name))
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, raw, **kwargs):
+    """Отпускаем прежнюю картинку поста после смены."""
+    released = getattr(instance, '_released_image', None)
+    if not raw and released:
+        release_after_commit(released)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    """Отпускаем картинку удалённого поста."""
+    if instance.image:
+        release_after_commit(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    """Сбрасываем ленты, в которые пост входит или входил."""
+    category = instance.category if instance.category_id else None
+    scopes = set(feed_cache.post_scopes(
+        category and category.slug, instance.author_id))
+    previous = getattr(instance, '_previous_feeds', None)
+    if previous:
+        scopes.update(feed_cache.post_scopes(*previous))
+    feed_cache.bump(page_cache.PAGE_SCOPE, *scopes)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_all_feeds(sender, **kwargs):
+    """Категория меняет видимость постов во всех лентах сразу."""
+    feed_cache.bump(feed_cache.GLOBAL_SCOPE)
+
+
+@receiver(posts_published)
+def invalidate_published_feeds(sender, post_ids, **kwargs):
+    """Сбрасываем ленты, в которых появились отложенные посты."""
+    scopes = set()
+    for category_slug, author_id in Post.objects.filter(
+            pk__in=post_ids).values_list('category__slug', 'author_id'):
+        scopes.update(feed_cache.post_scopes(category_slug, author_id))
+    feed_cache.bump(page_cache.PAGE_SCOPE, *scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_pages(sender, **kwargs):
+    """Комментарии и места видны только в готовых страницах."""
+    page_cache.invalidate()
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_pages_on_profile_change(
+        sender, instance, update_fields, raw, **kwargs):
+    """Имя автора есть на многих страницах; вход в систему не в счёт."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    page_cache.invalidate()
+    if not raw:
+        # Сдвигаем валидаторы страниц, где видно имя пользователя.
+        Post.objects.filter(
+            Q(author=instance) | Q(comments__author=instance)
+        ).update(updated_at=timezone.now())
@@ -0,0 +1,63 @@
+"""
+Сборка статики: имена с хэшем содержимого и заранее сжатые копии.
+
+collectstatic кладёт файлы в STATIC_ROOT под именами вида
+``css/bootstrap.min.3f2a1c.css`` и рядом пишет ``.gz`` и, если
+установлен пакет brotli, ``.br``. Отдаёт их StaticFilesMiddleware.
+Пока collectstatic не запускался (разработка, тесты), ссылки ведут на
+исходные имена.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.json', '.xml', '.html', '.map',
+)
+# Сжатая копия пишется, только если она заметно меньше оригинала.
+MIN_RATIO = 0.95
+
+
+def compress(data):
+    """Сжатые версии файла: {расширение копии: байты}."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {
+        extension: compressed for extension, compressed in variants.items()
+        if len(compressed) < len(data) * MIN_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который дописывает .gz и .br копии."""
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Статика не собрана — отдаём исходное имя.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.write_compressed(name)
+
+    def write_compressed(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for extension, compressed in compress(data).items():
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self._save(name + extension, ContentFile(compressed))
@@ -0,0 +1,128 @@
+"""
+Хранилище медиафайлов с адресацией по содержимому.
+
+Файлы из каталогов CONTENT_ADDRESSED_DIRS кладутся под именем
+sha256 содержимого в дерево из двух уровней по два символа хэша:
+``posts_images/ab/cd/abcd…ef.jpg``. В каждом каталоге остаётся немного
+файлов, а одинаковые загрузки хранятся один раз. Ссылки на файл — это
+посты с таким именем картинки; файл удаляется, когда их не остаётся
+(см. renditions.release_image).
+
+Повторная загрузка ссылается на файл раньше, чем пост с ней попадёт в
+базу, поэтому повторное использование и удаление идут под одной
+блокировкой на хэш, а повторно использованный файл «трогается»: удаление
+откладывается, пока с этого момента не прошло CONTENT_RELEASE_GRACE.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import fcntl
+except ImportError:  # Windows: только блокировки внутри процесса.
+    fcntl = None
+
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+CONTENT_NAME_RE = re.compile(
+    r'^(?:[^/]+/)+(?:[0-9a-f]{2}/){2}[0-9a-f]{64}(?:\.\w+)?$')
+LOCKS_DIR = '.locks'
+LOCK_STRIPES = 64
+
+_thread_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def content_digest(content):
+    """sha256 содержимого файла; позиция чтения возвращается в начало."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def content_name(directory, digest, extension):
+    """Имя файла в шардированном дереве."""
+    shards = [
+        digest[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH]
+        for level in range(SHARD_LEVELS)
+    ]
+    return posixpath.join(directory, *shards, digest + extension.lower())
+
+
+def is_content_addressed(name):
+    """Лежит ли файл уже в шардированном дереве."""
+    return bool(CONTENT_NAME_RE.match(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, который раскладывает файлы по хэшу содержимого."""
+
+    def recently_touched(self, name):
+        """Файл сохранён или повторно использован в пределах отсрочки."""
+        if not is_content_addressed(name):
+            # Обычные имена уникальны и повторно не используются.
+            return False
+        try:
+            modified = os.stat(self.path(name)).st_mtime
+        except FileNotFoundError:
+            return False
+        return time.time() - modified < settings.CONTENT_RELEASE_GRACE
+
+    @contextmanager
+    def content_lock(self, name):
+        """Повторное использование и удаление файла — по очереди."""
+        stripe = zlib.crc32(name.encode()) % LOCK_STRIPES
+        with _thread_locks[stripe]:
+            if fcntl is None:
+                yield
+                return
+            locks = os.path.join(self.location, LOCKS_DIR)
+            os.makedirs(locks, exist_ok=True)
+            with open(os.path.join(locks, f'{stripe}.lock'), 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _is_addressed_dir(self, name):
+        return posixpath.dirname(name) in settings.CONTENT_ADDRESSED_DIRS
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя задаёт содержимое, поиск свободного имени не нужен.
+        if self._is_addressed_dir(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not self._is_addressed_dir(name):
+            return super()._save(name, content)
+        target = content_name(
+            posixpath.dirname(name), content_digest(content),
+            posixpath.splitext(name)[1])
+        with self.content_lock(target):
+            try:
+                # Такое содержимое уже сохранено — второй копии не будет,
+                # а отметка времени удержит файл от удаления, пока пост с
+                # новой ссылкой не попал в базу.
+                os.utime(self.path(target))
+                return target
+            except FileNotFoundError:
+                pass
+            # Пишем во временный файл рядом и атомарно переименовываем,
+            # чтобы читатели не увидели недописанный файл.
+            temporary = super()._save(
+                f'{target}.{uuid.uuid4().hex}.tmp', content)
+            os.replace(self.path(temporary), self.path(target))
+        return target
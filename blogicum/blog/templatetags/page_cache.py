@@ -0,0 +1,23 @@
+"""Теги для кэша страниц."""
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.page_cache import HOLES, hole_marker, is_capturing
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **params):
+    """
+    Персональный кусок страницы.
+
+    При записи страницы в кэш выводим метку, иначе рендерим шаблон куска
+    в текущем контексте, как это сделал бы {% include %}.
+    """
+    if is_capturing(context.get('request')):
+        return mark_safe(hole_marker(name, params))
+    template_name, _ = HOLES[name]
+    hole_template = context.template.engine.get_template(template_name)
+    with context.push(**params):
+        return hole_template.render(context)
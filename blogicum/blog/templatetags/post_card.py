@@ -0,0 +1,23 @@
+"""Теги карточки поста."""
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def card_version(post):
+    """
+    Версия содержимого карточки для ключа кэша фрагмента.
+
+    Меняется при правке поста и при любом изменении, которое видно на
+    карточке: числа комментариев, категории, места или имени автора.
+    """
+    category = post.category
+    location = post.location
+    return ':'.join(str(part) for part in (
+        post.updated_at.timestamp(),
+        post.comment_count,
+        category and (category.is_published, category.slug, category.title),
+        location and (location.is_published, location.name),
+        post.author.username,
+    ))
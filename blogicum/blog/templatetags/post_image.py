@@ -0,0 +1,56 @@
+"""Тег картинки поста с адаптивными копиями."""
+from django import template
+from django.core.files.storage import default_storage
+
+from blog.renditions import FALLBACK, RENDITION_SIZES, WEBP
+from blog.resize import resized_name
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w' for width, name in variants)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, kind, css_class='', lazy=True):
+    """
+    Картинка поста через <picture>: WebP и запасной формат с srcset.
+
+    Размеры берутся из image_meta, файл не открывается. Пока копии не
+    построены, выводится оригинал. lazy=False — для главной картинки
+    страницы, которую браузер должен грузить сразу.
+    """
+    meta = post.image_meta
+    variants = meta.get('renditions', {}).get(kind)
+    context = {
+        'post': post,
+        'css_class': css_class,
+        'width': meta.get('width'),
+        'height': meta.get('height'),
+        'lazy': lazy,
+    }
+    if variants and variants[FALLBACK]:
+        context.update(
+            src=default_storage.url(variants[FALLBACK][0][1]),
+            srcset=_srcset(variants[FALLBACK]),
+            webp_srcset=_srcset(variants[WEBP]),
+            sizes=RENDITION_SIZES[kind],
+        )
+    else:
+        context['src'] = post.image.url
+    return context
+
+
+@register.simple_tag(takes_context=True)
+def resized_url(context, image, width, height=0):
+    """
+    Абсолютный URL копии картинки заданного размера (/media/r/...).
+
+    Копия строится при первом запросе; 0 вместо стороны — по пропорциям.
+    Размер должен быть в RESIZE_SIZES, иначе по URL будет 404.
+    """
+    url = default_storage.url(resized_name(width, height, image.name))
+    request = context.get('request')
+    return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,88 @@
+"""
+Приём загруженных картинок постов.
+
+Загрузка уже лежит во временном файле (TemporaryFileUploadHandler).
+Перед декодированием по заголовку проверяются объём и число пикселей,
+поэтому «декомпрессионная бомба» отсекается до выделения памяти. JPEG
+декодируется сразу в уменьшенном масштабе (``Image.draft``), так что
+пиковая память ограничена IMAGE_UPLOAD_MAX_SIDE, а не размером фото.
+Результат повёрнут по EXIF, уменьшен и пересохранён без метаданных.
+"""
+import os
+import tempfile
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 88, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png'}
+
+
+def _open(upload):
+    """Открываем только заголовок; бомбы и не-картинки отклоняем."""
+    upload.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(upload)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ValidationError(
+            'Слишком большое разрешение картинки.', code='too_many_pixels')
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError(
+            'Загрузите корректную картинку.', code='invalid_image')
+    if image.width * image.height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение картинки: не больше %(limit)s Мп.',
+            code='too_many_pixels',
+            params={'limit': settings.IMAGE_UPLOAD_MAX_PIXELS // 10 ** 6})
+    return image
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+
+
+def ingest_image(upload):
+    """Проверяем, поворачиваем и уменьшаем загрузку; возвращаем новый файл."""
+    if upload.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Файл слишком большой: не больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES)})
+    image = _open(upload)
+    max_side = settings.IMAGE_UPLOAD_MAX_SIDE
+    # Для JPEG декодер сразу уменьшает картинку в 2, 4 или 8 раз.
+    image.draft('RGB', (max_side, max_side))
+    icc_profile = image.info.get('icc_profile')
+    try:
+        image = ImageOps.exif_transpose(image)
+    except (OSError, SyntaxError):
+        raise ValidationError(
+            'Картинка повреждена.', code='invalid_image')
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    image_format = 'PNG' if _has_alpha(image) else 'JPEG'
+    image = image.convert('RGBA' if image_format == 'PNG' else 'RGB')
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    # Небольшой результат остаётся в памяти, большой уходит на диск.
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    # Кодировщик PNG берёт EXIF из image.info, а его переживают и
+    # exif_transpose(), и convert(): очищаем всё, профиль передаём явно.
+    image.info = {}
+    options = dict(SAVE_OPTIONS[image_format])
+    if icc_profile:
+        # Цветовой профиль — не метаданные, без него поедут цвета.
+        options['icc_profile'] = icc_profile
+    image.save(output, image_format, **options)
+    output.seek(0)
+    return File(output, name=name + EXTENSIONS[image_format])
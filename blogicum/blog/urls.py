@@ -1,12 +1,19 @@
 """Связь URL с представлениями."""
+from django.conf import settings
 from django.urls import include, path
 
-from . import views
+from . import api, async_views, views
 
 app_name = 'blog'
+# Страницы ленты и поста под ASGI — в асинхронном варианте.
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 post_urls = [
-    path('<int:post_id>/', views.post_detail, name='post_detail'),
+    path('<int:post_id>/', read_views.post_detail, name='post_detail'),
+    path(
+        '<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'),
     path('create/', views.create_post, name='create_post'),
     path('<int:post_id>/edit/', views.edit_post, name='edit_post'),
     path('<int:post_id>/delete/', views.delete_post, name='delete_post'),
@@ -21,13 +28,26 @@ post_urls = [
         name='delete_comment')
 ]
 
+api_urls = [
+    path('posts/', api.index, name='api_index'),
+    path('posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path(
+        'category/<slug:category_slug>/',
+        api.category_posts,
+        name='api_category_posts'),
+    path('profile/<str:username>/', api.profile, name='api_profile'),
+]
+
 urlpatterns = [
-    path('', views.index, name='index'),
+    path('', read_views.index, name='index'),
+    path('search/', views.search, name='search'),
     path('posts/', include(post_urls)),
     path(
         'category/<slug:category_slug>/',
-        views.category_posts,
+        read_views.category_posts,
         name='category_posts'),
-    path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/', read_views.profile, name='profile'),
     path('edit_profile/', views.edit_profile, name='edit_profile'),
+    path('api/', include(api_urls)),
+    path('export/', views.export, name='export'),
 ]
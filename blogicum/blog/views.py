@@ -1,35 +1,80 @@
 """Представления."""
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 
+from . import db_executor, renditions, write_queue
+from .conditional import (
+    conditional_render, feed_validators, post_etag, post_last_modified)
+from .export import (
+    encode_stream, export_lines, parse_after_ids, parse_models, parse_since)
+from .feed_cache import cached_page_paginator
 from .forms import PostForm, CommentForm, UserForm
 from .models import Post, Category, User, Comment
-from .page_paginator import page_paginator
+from .page_cache import cache_page_for_visitors
+from .page_paginator import comments_paginator, page_paginator
 from .posts_queryset import posts_queryset
+from .search import search_paginator
 
 
+def get_readable_post(request, post_id):
+    """Пост, который видит посетитель: скрытые посты — только автору."""
+    post = get_object_or_404(posts_queryset(), id=post_id)
+    if not post.is_visible and post.author != request.user:
+        raise Http404
+    return post
+
+
+@cache_page_for_visitors()
 def index(request):
     """Главная страница."""
-    post_list = posts_queryset(hide=True, annotate=True)
-    context = page_paginator(post_list, request)
-    return render(request, 'blog/index.html', context)
+    post_list = posts_queryset(hide=True)
+    context = cached_page_paginator('index', post_list, request)
+    return conditional_render(
+        request, 'blog/index.html', context,
+        feed_validators(context['page_obj']))
 
 
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+@cache_page_for_visitors(anonymous_only=True)
 def post_detail(request, post_id):
     """Страница отдельного поста."""
-    post = get_object_or_404(posts_queryset(), id=post_id)
-    if post.author != request.user:
-        post = get_object_or_404(
-            posts_queryset(hide=True),
-            id=post_id)
+    post = get_readable_post(request, post_id)
     form = CommentForm()
-    comments = post.comments.select_related('author')
-    return render(
+    comments = comments_paginator(
+        post.comments.select_related('author'), request)
+    response = render(
         request, 'blog/detail.html',
         {'post': post, 'comments': comments, 'form': form}
     )
+    patch_cache_control(response, no_cache=True)
+    return response
 
 
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def post_comments(request, post_id):
+    """Следующая порция комментариев для кнопки «Показать ещё»."""
+    post = get_readable_post(request, post_id)
+    comments = comments_paginator(
+        post.comments.select_related('author'), request)
+    response = render(
+        request, 'includes/comment_list.html',
+        {'post': post, 'comments': comments}
+    )
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def search(request):
+    """Поиск по заголовкам и текстам постов."""
+    return render(request, 'blog/search.html', search_paginator(request))
+
+
+@cache_page_for_visitors()
 def category_posts(request, category_slug):
     """Страница с постами в выбранной категории."""
     category = get_object_or_404(
@@ -39,34 +84,36 @@ def category_posts(request, category_slug):
     )
     post_list = posts_queryset(
         model_manager=category.posts,
-        hide=True,
-        annotate=True)
+        hide=True)
     context = {'category': category}
-    context.update(page_paginator(post_list, request))
-    return render(
-        request, 'blog/category.html',
-        context
-    )
+    context.update(cached_page_paginator(
+        f'category:{category.slug}', post_list, request))
+    return conditional_render(
+        request, 'blog/category.html', context,
+        feed_validators(context['page_obj'], category.updated_at))
 
 
+@cache_page_for_visitors(anonymous_only=True)
 def profile(request, username):
     """Страница пользователя."""
     profile = get_object_or_404(User, username=username)
     context = {'profile': profile}
-    if request.user.username == username:
-        post = posts_queryset(model_manager=profile.posts, annotate=True)
+    is_owner = request.user.username == username
+    if is_owner:
+        post = posts_queryset(model_manager=profile.posts)
+        context.update(page_paginator(post, request))
     else:
         post = posts_queryset(
             model_manager=profile.posts,
-            hide=True,
-            annotate=True
+            hide=True
         )
-    context.update(page_paginator(post, request))
-    return render(
-        request,
-        'blog/profile.html',
-        context
-    )
+        context.update(cached_page_paginator(
+            f'author:{profile.pk}', post, request))
+    return conditional_render(
+        request, 'blog/profile.html', context,
+        feed_validators(
+            context['page_obj'], is_owner,
+            profile.get_full_name(), profile.is_staff))
 
 
 @login_required
@@ -100,7 +147,9 @@ def create_post(request):
     if form.is_valid():
         instance = form.save(commit=False)
         instance.author = request.user
-        instance.save()
+        # Файл пишем здесь, через очередь записи идёт только строка поста.
+        renditions.prepare_image(instance)
+        write_queue.run(instance.save)
         return redirect('blog:profile', request.user.username)
     return render(request, 'blog/create.html', context)
 
@@ -150,7 +199,7 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        write_queue.run(transaction.atomic(comment.save))
     return redirect('blog:post_detail', post_id=post_id)
 
 
@@ -176,6 +225,33 @@ def delete_comment(request, post_id, comment_id):
         return redirect('blog:post_detail', post_id=post_id)
     context = {'instance': instance}
     if request.method == 'POST':
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
         return redirect('blog:post_detail', post_id=post_id)
     return render(request, 'blog/comment.html', context)
+
+
+@staff_member_required
+def export(request):
+    """Потоковая выгрузка данных блога в NDJSON для сотрудников."""
+    try:
+        models = parse_models(request.GET.get('models'))
+        since = parse_since(request.GET.get('since'))
+        after_ids = parse_after_ids(
+            request.GET.get('after_id'), models, (
+                (key[len('after_id.'):], value)
+                for key, value in request.GET.items()
+                if key.startswith('after_id.')
+            ))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    compress = request.GET.get('gzip') == '1'
+    response = StreamingHttpResponse(
+        db_executor.stream(request, encode_stream(
+            export_lines(models, since, after_ids), compress=compress)),
+        content_type=(
+            'application/gzip' if compress else 'application/x-ndjson'),
+    )
+    filename = 'blogicum.ndjson.gz' if compress else 'blogicum.ndjson'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,132 @@
+"""
+Очередь записи в базу с единственным писателем.
+
+SQLite пропускает одного писателя за раз, и при всплесках комментариев
+одновременные транзакции из разных потоков упираются в «database is
+locked». Здесь записи из потоков процесса выстраиваются в очередь и
+выполняются одним потоком-писателем пачками: до WRITE_QUEUE_BATCH записей
+в одной транзакции, каждая в своей точке сохранения, чтобы ошибка одной
+записи не откатывала остальные. Вызывающий ждёт фиксации транзакции.
+
+Очередь ограничена WRITE_QUEUE_SIZE: если она полна дольше
+WRITE_QUEUE_TIMEOUT секунд или запись за это время не началась, бросается
+WriteQueueBusy и запись не выполняется. Внутри открытой транзакции, в
+самом писателе и при ``WRITE_QUEUE_SIZE = 0`` запись выполняется сразу.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class WriteQueueBusy(Exception):
+    """Запись не принята или не начата за отведённое время."""
+
+
+class Writer:
+    """Поток-писатель и его очередь."""
+
+    def __init__(self, size, batch):
+        self.jobs = queue.Queue(maxsize=size)
+        self.batch = batch
+        self.pid = os.getpid()
+        self.thread = threading.Thread(
+            target=self.loop, name='db-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, func, args, kwargs, timeout):
+        future = Future()
+        try:
+            self.jobs.put((future, func, args, kwargs), timeout=timeout)
+        except queue.Full:
+            raise WriteQueueBusy('Очередь записи переполнена.')
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # Запись, которая уже началась, дожидаемся: её итог известен.
+            if future.cancel():
+                raise WriteQueueBusy('Запись не началась вовремя.')
+            return future.result()
+
+    def take(self):
+        """Первая запись ждёт сколько нужно, остальные — нет."""
+        jobs = [self.jobs.get()]
+        while len(jobs) < self.batch and jobs[-1] is not None:
+            try:
+                jobs.append(self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        return jobs
+
+    def loop(self):
+        # Блокировка записи берётся в начале транзакции, а не при первой
+        # записи: так её ждёт busy_timeout, а не бросает SQLITE_BUSY.
+        connection.begin_immediate = True
+        while True:
+            jobs = self.take()
+            running = [
+                job for job in jobs
+                if job is not None and job[0].set_running_or_notify_cancel()
+            ]
+            if running:
+                self.write(running)
+            if None in jobs:
+                break
+        connection.close()
+
+    def write(self, jobs):
+        close_old_connections()
+        results = []
+        try:
+            with transaction.atomic():
+                for future, func, args, kwargs in jobs:
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(*args, **kwargs)))
+                    except Exception as error:
+                        future.set_exception(error)
+        except Exception as error:
+            logger.exception('Пачка записей не зафиксирована.')
+            for future, _ in results:
+                future.set_exception(error)
+            return
+        for future, result in results:
+            future.set_result(result)
+
+    def stop(self, timeout=None):
+        """Дописываем принятое и останавливаем писателя."""
+        try:
+            self.jobs.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+
+
+def get_writer():
+    """Писатель текущего процесса; после fork запускается заново."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = Writer(
+                settings.WRITE_QUEUE_SIZE, settings.WRITE_QUEUE_BATCH)
+            atexit.register(_writer.stop, settings.WRITE_QUEUE_TIMEOUT)
+        return _writer
+
+
+def run(func, *args, **kwargs):
+    """Выполняем запись через писателя и возвращаем её результат."""
+    if (not settings.WRITE_QUEUE_SIZE or connection.in_atomic_block
+            or threading.current_thread().name == 'db-writer'):
+        return func(*args, **kwargs)
+    return get_writer().submit(
+        func, args, kwargs, settings.WRITE_QUEUE_TIMEOUT)
@@ -47,12 +47,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'blog.middleware.StaticFilesMiddleware',
+    'blog.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.WriteQueueBusyMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -83,8 +85,25 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с прагмами из blog/sqlite/base.py (WAL, mmap, кэш).
+        'ENGINE': 'blog.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постоянные соединения: без переподключения на каждый запрос.
+        'CONN_MAX_AGE': 600,
+        # Дополняют и переопределяют DEFAULT_PRAGMAS; None — не задавать.
+        'PRAGMAS': {},
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# В продакшене здесь должен быть общий для всех процессов бэкенд
+# (Memcached или Redis), иначе сброс поколений лент не дойдёт до соседей.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -131,6 +150,14 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
 ]
 
+STATIC_ROOT = BASE_DIR / 'static'
+
+# collectstatic добавляет хэш содержимого к именам и пишет .gz/.br копии.
+STATICFILES_STORAGE = 'blog.static_assets.CompressedManifestStaticFilesStorage'
+
+# Кэширование статики без хэша в имени, секунды.
+STATIC_MAX_AGE = 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -142,10 +169,86 @@ LOGIN_REDIRECT_URL = 'blog:index'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+MEDIA_URL = '/media/'
+
+# Кэширование файлов без хэша содержимого в имени, секунды.
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+
+# Отдача файлов фронтенд-сервером: 'X-Accel-Redirect' (nginx, внутренний
+# location с префиксом MEDIA_OFFLOAD_PREFIX и alias на MEDIA_ROOT) или
+# 'X-Sendfile' (Apache, lighttpd); None — файлы отдаёт Django.
+MEDIA_OFFLOAD_HEADER = None
+
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+
+# Копии картинок по запросу: /media/r/<ширина>x<высота>/<путь>. Строятся
+# только эти размеры (0 — сторона по пропорциям): иначе любой посетитель
+# мог бы заставить сервер пересчитывать картинки под сколько угодно рамок.
+RESIZE_SIZES = {
+    (1200, 630),  # og:image страницы поста
+    (2400, 1260),  # то же для экранов с двойной плотностью
+}
+
+RESIZE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Картинки постов лежат под хэшем содержимого, одинаковые — одним файлом.
+DEFAULT_FILE_STORAGE = 'blog.storage.ContentAddressedStorage'
+
+CONTENT_ADDRESSED_DIRS = ('posts_images',)
+# Сколько секунд не удалять только что сохранённый или повторно
+# использованный файл: ссылка на него ещё может быть в незавершённой
+# транзакции.
+CONTENT_RELEASE_GRACE = 10 * 60
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 ITEMS_PER_PAGE = 10
 
+COMMENTS_PER_PAGE = 50
+
+API_MAX_PAGE_SIZE = 1000
+
+# Асинхронные страницы ленты и поста (для запуска под ASGI).
+ASYNC_VIEWS = False
+
+# Потоки для запросов к базе из асинхронных страниц; 0 — общий поток
+# синхронного кода Django.
+ASYNC_DB_WORKERS = 8
+
+# Очередь записи в базу (blog/write_queue.py): сколько записей ждёт
+# писателя, сколько пишется одной транзакцией и сколько секунд ждать места
+# в очереди и начала записи; 0 вместо размера — писать сразу.
+WRITE_QUEUE_SIZE = 1000
+WRITE_QUEUE_BATCH = 50
+WRITE_QUEUE_TIMEOUT = 5
+
+SESSION_ENGINE = 'blog.sessions'
+
+# Потоки для построения уменьшенных копий картинок; 0 — строить сразу.
+RENDITION_WORKERS = 2
+
+# Загрузки сразу пишутся во временный файл, а не копятся в памяти.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+IMAGE_UPLOAD_MAX_BYTES = 30 * 1024 * 1024
+
+IMAGE_UPLOAD_MAX_PIXELS = 60_000_000
+
+# Длинная сторона сохраняемого оригинала.
+IMAGE_UPLOAD_MAX_SIDE = 2560
+
+KEYSET_PAGINATION = True
+
+FEED_CACHE_TIMEOUT = 60 * 15
+
+FEED_CACHE_STALE_TIMEOUT = 60 * 60 * 24
+
+FEED_CACHE_LOCK_TIMEOUT = 10
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+
 LOGIN_URL = 'login'
@@ -1,10 +1,11 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 from django.urls import include, path, reverse_lazy
 
+from blog import media, resize
+
 
 urlpatterns = [
     path('', include('blog.urls')),
@@ -19,8 +20,19 @@ urlpatterns = [
             success_url=reverse_lazy('blog:index'),
         ),
         name='registration',
-    )
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    ),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}{resize.RESIZE_DIR}/'
+        '<int:width>x<int:height>/<path:path>',
+        resize.resized,
+        name='media_resized',
+    ),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        media.serve,
+        name='media',
+    ),
+]
 
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
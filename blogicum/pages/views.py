@@ -1,14 +1,19 @@
 """Представления для статичных страниц."""
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 
+from blog.page_cache import cache_page_for_visitors
 
+
+@method_decorator(cache_page_for_visitors(), name='dispatch')
 class About(TemplateView):
     """Отображение статичной страницы О проекте."""
 
     template_name = 'pages/about.html'
 
 
+@method_decorator(cache_page_for_visitors(), name='dispatch')
 class Rules(TemplateView):
     """Отображение статичной страницы Правила."""
 
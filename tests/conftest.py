@@ -1,3 +1,4 @@
+import io
 import os
 import re
 import time
@@ -19,12 +20,14 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
+from PIL import Image
 
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
@@ -41,6 +44,36 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # База откатывается после каждого теста, а кэш — нет.
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    # Загрузки, копии картинок и блокировки хранилища — во временной папке,
+    # копии строятся сразу, а освободившиеся файлы удаляются без отсрочки.
+    media_root = tmp_path / "media"
+    media_root.mkdir()
+    settings.MEDIA_ROOT = media_root
+    settings.RENDITION_WORKERS = 0
+    settings.CONTENT_RELEASE_GRACE = 0
+    return media_root
+
+
+@pytest.fixture
+def jpeg():
+    def make(width=50, height=40, color=(200, 80, 40), name="photo.jpg"):
+        buffer = io.BytesIO()
+        Image.new("RGB", (width, height), color).save(buffer, "JPEG")
+        return ContentFile(buffer.getvalue(), name=name)
+    return make
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _json(response):
+    assert response.streaming, (
+        "Убедитесь, что ответы API отдаются через StreamingHttpResponse."
+    )
+    return json.loads(b"".join(response.streaming_content))
+
+
+def test_api_feed_pages(client, many_posts_with_published_locations):
+    data = _json(client.get("/api/posts/", {"limit": 4}))
+    seen = [post["id"] for post in data["results"]]
+    while data["next"]:
+        data = _json(client.get(
+            "/api/posts/", {"limit": 4, "cursor": data["next"]}))
+        seen.extend(post["id"] for post in data["results"])
+    html = client.get("/")
+    assert seen[:len(html.context["page_obj"])] == [
+        post.id for post in html.context["page_obj"]]
+    assert len(seen) == len(set(seen)) == len(
+        many_posts_with_published_locations), (
+        "Убедитесь, что курсор API проходит ленту без повторов и пропусков."
+    )
+
+
+def test_api_sparse_fields(client, many_posts_with_published_locations):
+    data = _json(client.get("/api/posts/", {"fields": "id,title"}))
+    assert all(set(post) == {"id", "title"} for post in data["results"]), (
+        "Убедитесь, что параметр `fields` оставляет только указанные поля."
+    )
+    response = client.get("/api/posts/", {"fields": "id,password"})
+    assert response.status_code == 400
+
+
+def test_api_serializes_from_values(
+        client, many_posts_with_published_locations):
+    with CaptureQueriesContext(connection) as queries:
+        _json(client.get("/api/posts/", {"limit": 50}))
+    assert len(queries) == 1, (
+        "Убедитесь, что страница ленты API читается одним запросом."
+    )
+
+
+def test_api_post_detail(
+        client, mixer, user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    data = _json(client.get(f"/api/posts/{post.id}/", {"limit": 2}))
+    assert data["post"]["id"] == post.id
+    assert len(data["comments"]) == 2 and data["next"], (
+        "Убедитесь, что комментарии поста в API разбиты на страницы."
+    )
+
+
+def test_api_hides_unpublished(
+        client, user_client, posts_with_unpublished_category):
+    post = posts_with_unpublished_category[0]
+    assert client.get(f"/api/posts/{post.id}/").status_code == 404
+    assert user_client.get(f"/api/posts/{post.id}/").status_code == 200
+    assert not _json(client.get("/api/posts/"))["results"]
+
+
+def _asgi_get(path):
+    """Запрос через настоящий ASGI-обработчик, а не тестовый клиент."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(ASGIHandler())({
+        "type": "http", "method": "GET", "path": path, "query_string": b"",
+        "headers": [], "server": ("testserver", 80),
+    }, receive, send)
+    status = messages[0]["status"]
+    return status, b"".join(
+        message.get("body", b"") for message in messages[1:])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_api_streams_under_asgi(post_with_published_location):
+    post_id = post_with_published_location.id
+    for path in ("/api/posts/", f"/api/posts/{post_id}/"):
+        status, body = _asgi_get(path)
+        assert status == 200 and json.loads(body), (
+            f"Убедитесь, что `{path}` под ASGI читает базу не из цикла "
+            "событий."
+        )
@@ -0,0 +1,89 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import AsyncRequestFactory, Client, override_settings
+from django.utils.functional import SimpleLazyObject
+
+from blog import async_views, views
+
+
+def get(path, user=None, **headers):
+    request = AsyncRequestFactory().get(path, **headers)
+    request.user = user or AnonymousUser()
+    return request
+
+
+@pytest.mark.django_db
+@override_settings(ASYNC_DB_WORKERS=0)
+def test_async_views_match_sync(
+        user, published_category, many_posts_with_published_locations):
+    for view, path, args in (
+        ("index", "/", ()),
+        ("category_posts", f"/category/{published_category.slug}/",
+         (published_category.slug,)),
+        ("profile", f"/profile/{user.username}/", (user.username,)),
+    ):
+        response = async_to_sync(getattr(async_views, view))(
+            get(path), *args)
+        expected = getattr(views, view)(get(path), *args)
+        assert response.status_code == 200 and (
+            response.content == expected.content), (
+            f"Убедитесь, что асинхронная `{view}` отдаёт ту же страницу, "
+            "что и синхронная."
+        )
+
+    with pytest.raises(Http404):
+        async_to_sync(async_views.category_posts)(
+            get("/category/no-such-slug/"), "no-such-slug")
+
+
+@pytest.mark.django_db
+@override_settings(ASYNC_DB_WORKERS=0)
+def test_async_post_detail_not_modified(post_with_published_location):
+    post_id = post_with_published_location.id
+    response = async_to_sync(async_views.post_detail)(
+        get(f"/posts/{post_id}/"), post_id)
+    assert response.status_code == 200 and response.has_header("ETag"), (
+        "Убедитесь, что асинхронная страница поста отдаёт ETag."
+    )
+    assert async_to_sync(async_views.post_detail)(
+        get(f"/posts/{post_id}/", **{"If-None-Match": response["ETag"]}),
+        post_id,
+    ).status_code == 304, (
+        "Убедитесь, что на совпадающий If-None-Match отдаётся ответ 304."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(ASYNC_DB_WORKERS=2)
+def test_async_views_in_db_pool(user, published_category, mixer):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, location=None)
+    response = async_to_sync(async_views.category_posts)(
+        get(f"/category/{published_category.slug}/"),
+        published_category.slug)
+    content = response.content.decode()
+    assert response.status_code == 200 and all(
+        post.title in content for post in posts), (
+        "Убедитесь, что запросы асинхронных страниц работают в пуле "
+        "потоков для базы."
+    )
+
+
+@pytest.mark.django_db
+@override_settings(ASYNC_DB_WORKERS=0)
+def test_async_profile_head_for_logged_in_user(user):
+    client = Client()
+    client.force_login(user)
+    request = AsyncRequestFactory().head(f"/profile/{user.username}/")
+    request.session = client.session
+    # Как AuthenticationMiddleware: пользователь загружается при обращении.
+    request.user = SimpleLazyObject(lambda: get_user(request))
+    response = async_to_sync(async_views.profile)(request, user.username)
+    assert response.status_code == 200, (
+        "Убедитесь, что HEAD-запрос автора к асинхронному профилю не "
+        "обращается к базе из цикла событий."
+    )
@@ -0,0 +1,60 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_views(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/comment"
+    for text in ("первый", "второй"):
+        user_client.post(url, data={"text": text})
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что добавление комментария увеличивает"
+        " `Post.comment_count`."
+    )
+
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}")
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что удаление комментария уменьшает"
+        " `Post.comment_count`."
+    )
+
+
+def test_comment_moved_between_posts(
+        mixer, post_with_published_location, post_of_another_author):
+    comment = mixer.blend("blog.Comment", post=post_with_published_location)
+    comment.post = post_of_another_author
+    comment.save()
+    counts = dict(Post.objects.values_list("id", "comment_count"))
+    assert counts[post_with_published_location.id] == 0
+    assert counts[post_of_another_author.id] == 1
+
+
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    Post.objects.update(comment_count=0)
+    call_command("recount_comments", chunk_size=1)
+    post.refresh_from_db()
+    assert post.comment_count == 3
+
+
+def test_feed_query_has_no_grouping(
+        user_client, post_with_published_location):
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get("/")
+    feed_sql = [q["sql"] for q in queries if "blog_post" in q["sql"]]
+    assert feed_sql
+    assert not any("GROUP BY" in sql for sql in feed_sql), (
+        "Убедитесь, что лента читает сохранённый счётчик комментариев"
+        " вместо агрегации по таблице комментариев."
+    )
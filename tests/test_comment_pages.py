@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def thread(mixer, user, post_with_published_location):
+    return [
+        mixer.blend(
+            "blog.Comment", post=post_with_published_location, author=user,
+            text=f"Комментарий номер {i}.")
+        for i in range(7)
+    ]
+
+
+def _texts(content):
+    return re.findall(r"Комментарий номер \d+", content.decode())
+
+
+def test_comments_are_loaded_in_batches(
+        settings, client, thread, post_with_published_location):
+    settings.COMMENTS_PER_PAGE = 3
+    post_id = post_with_published_location.id
+    response = client.get(f"/posts/{post_id}/")
+    assert _texts(response.content) == [
+        c.text.rstrip(".") for c in thread[:3]], (
+        "Убедитесь, что на странице поста выводится только первая порция"
+        " комментариев."
+    )
+
+    cursor = response.context["comments"].next_cursor
+    shown = []
+    while cursor:
+        fragment = client.get(
+            f"/posts/{post_id}/comments/", {"cursor": cursor})
+        assert fragment.status_code == 200
+        shown.extend(_texts(fragment.content))
+        cursor = fragment.context["comments"].next_cursor
+    assert shown == [c.text.rstrip(".") for c in thread[3:]], (
+        "Убедитесь, что кнопка «Показать ещё» по порциям подгружает"
+        " оставшиеся комментарии."
+    )
+
+
+def test_hidden_post_comments_not_found(
+        another_user_client, posts_with_unpublished_category):
+    post = posts_with_unpublished_category[0]
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 404, (
+        "Убедитесь, что комментарии скрытого поста недоступны другим"
+        " пользователям."
+    )
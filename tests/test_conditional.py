@@ -0,0 +1,70 @@
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_detail_not_modified(client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"), (
+        "Убедитесь, что страница поста отдаёт заголовки ETag и"
+        " Last-Modified."
+    )
+
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=response["ETag"]
+    ).status_code == 304, (
+        "Убедитесь, что на совпадающий If-None-Match отдаётся ответ 304."
+    )
+    assert client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    ).status_code == 304, (
+        "Убедитесь, что на свежий If-Modified-Since отдаётся ответ 304."
+    )
+
+
+def test_comment_changes_post_etag(
+        client, mixer, user, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = client.get(url)["ETag"]
+    mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and response["ETag"] != etag, (
+        "Убедитесь, что новый комментарий меняет ETag страницы поста."
+    )
+
+
+def test_index_not_modified(
+        client, mixer, user, published_category,
+        many_posts_with_published_locations):
+    response = client.get("/")
+    etag = response["ETag"]
+    assert client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+        "Убедитесь, что главная страница отвечает 304 на свежий ETag."
+    )
+
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now())
+    assert client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+        "Убедитесь, что новый пост в ленте меняет её ETag."
+    )
+
+
+@pytest.mark.parametrize("path", ["/", "/posts/{post_id}/"])
+def test_login_changes_etag(
+        client, user, post_with_published_location, path):
+    url = path.format(post_id=post_with_published_location.id)
+    etag = client.get(url)["ETag"]
+    client.force_login(user)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and response["ETag"] != etag, (
+        "Убедитесь, что ETag гостя не подходит вошедшему пользователю:"
+        " иначе браузер покажет ему страницу гостя."
+    )
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
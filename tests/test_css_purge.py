@@ -0,0 +1,61 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from blog.css_purge import CssPurger
+
+CSS = (
+    '@charset "UTF-8";/*! license */:root{--x:1}'
+    ".card,.used{color:red}.unused{color:blue}"
+    "table{margin:0}.used:not(.unused)>a{top:0}"
+    "@media (min-width:576px){.unused{left:0}.used{left:1px}}"
+    "@keyframes spin{to{transform:rotate(1turn)}}"
+    "@keyframes fade-out{to{opacity:0}}"
+    ".used-spin{animation:spin 1s}"
+)
+
+
+def test_purger_keeps_only_used_rules():
+    purged = CssPurger({"used", "used-spin"}).purge(CSS)
+    assert ".unused{" not in purged and "color:blue" not in purged, (
+        "Убедитесь, что правила с неиспользуемыми классами удаляются."
+    )
+    assert ".used{color:red}" in purged and (
+        "@media (min-width:576px){.used{left:1px}}" in purged), (
+        "Убедитесь, что используемые правила сохраняются, в том числе в @media."
+    )
+    assert "/*! license */" in purged and "table{margin:0}" in purged
+    assert "@keyframes spin" in purged and "fade-out" not in purged, (
+        "Убедитесь, что остаются только используемые анимации."
+    )
+
+    critical = CssPurger(
+        {"used"}, check_elements=True, standalone=False).purge(CSS)
+    assert "table" not in critical and "license" not in critical and (
+        ".used{color:red}" in critical), (
+        "Убедитесь, что в критический CSS попадают только правила шапки."
+    )
+
+
+@pytest.mark.django_db
+def test_build_css_command(tmp_path, client):
+    purged = tmp_path / "purged.css"
+    critical = tmp_path / "critical.html"
+    call_command(
+        "build_css", purged=purged, critical=critical, stdout=io.StringIO())
+    css = purged.read_text()
+    assert ".navbar-brand" in css and ".card-body" in css, (
+        "Убедитесь, что урезанный CSS содержит классы из шаблонов."
+    )
+    assert ".carousel" not in css and ".accordion" not in css, (
+        "Убедитесь, что классы, которых нет в шаблонах, удаляются."
+    )
+    inline = critical.read_text()
+    assert ".navbar" in inline and ".card-body" not in inline
+
+    content = client.get("/").content.decode()
+    assert "<style>" in content and "bootstrap.purged.css" in content, (
+        "Убедитесь, что страница встраивает критический CSS и загружает "
+        "урезанный Bootstrap."
+    )
@@ -0,0 +1,75 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _lines(data):
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+def test_export_command_is_incremental(
+        tmp_path, mixer, user, post_with_published_location):
+    mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location, author=user)
+    output = tmp_path / "export.ndjson.gz"
+    call_command("export_blog", output=str(output), gzip=True)
+    rows = _lines(gzip.decompress(output.read_bytes()))
+    assert [row["model"] for row in rows] == [
+        "blog.category", "blog.location", "blog.post",
+        "blog.comment", "blog.comment", "blog.comment"], (
+        "Убедитесь, что выгрузка идёт по моделям в порядке зависимостей."
+    )
+    assert rows[2]["fields"]["title"] == post_with_published_location.title
+
+    last_id = rows[-2]["pk"]
+    call_command(
+        "export_blog", output=str(output), models="comment",
+        after_id=last_id)
+    assert [row["pk"] for row in _lines(output.read_bytes())] == [
+        rows[-1]["pk"]], (
+        "Убедитесь, что выгрузка по водяному знаку отдаёт только новые"
+        " строки."
+    )
+
+
+def test_export_view_is_staff_only(
+        client, user_client, admin_client, post_with_published_location):
+    assert client.get("/export/").status_code == 302
+    assert user_client.get("/export/").status_code == 302
+    response = admin_client.get("/export/", {"models": "post"})
+    assert response.status_code == 200 and response.streaming, (
+        "Убедитесь, что выгрузка для сотрудников отдаётся потоком."
+    )
+    rows = _lines(b"".join(response.streaming_content))
+    assert [row["pk"] for row in rows] == [post_with_published_location.pk]
+    assert admin_client.get(
+        "/export/", {"models": "users"}).status_code == 400
+
+
+def test_export_after_id_per_model(
+        tmp_path, mixer, admin_client, user, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(2).blend("blog.Comment", post=post, author=user)
+    output = tmp_path / "export.ndjson"
+    call_command(
+        "export_blog", output=str(output), models="post,comment",
+        after_id=f"post={post.pk},comment={comments[0].pk}")
+    assert [(row["model"], row["pk"]) for row in _lines(
+        output.read_bytes())] == [("blog.comment", comments[1].pk)], (
+        "Убедитесь, что водяной знак по id задаётся для каждой модели"
+        " отдельно."
+    )
+
+    response = admin_client.get("/export/", {
+        "models": "post,comment", "after_id.comment": comments[1].pk})
+    rows = _lines(b"".join(response.streaming_content))
+    assert [row["model"] for row in rows] == ["blog.post"]
+    assert admin_client.get("/export/", {
+        "models": "post,comment", "after_id": post.pk}).status_code == 400, (
+        "Убедитесь, что один after_id без имени модели не применяется"
+        " сразу к нескольким моделям."
+    )
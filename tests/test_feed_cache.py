@@ -0,0 +1,87 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import feed_cache, page_cache
+from blog.posts_queryset import posts_queryset
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _post_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, [
+        q["sql"] for q in queries if q["sql"].startswith("SELECT")
+        and 'FROM "blog_post"' in q["sql"]
+    ]
+
+
+def test_cached_page_is_fetched_by_ids(
+        client, many_posts_with_published_locations):
+    first, _ = _post_queries(client, "/")
+    page_cache.invalidate()
+    second, queries = _post_queries(client, "/")
+    assert len(queries) == 1 and " IN (" in queries[0], (
+        "Убедитесь, что страница ленты из кэша читается одним запросом"
+        " `id__in`."
+    )
+    assert [p.id for p in first.context["page_obj"]] == [
+        p.id for p in second.context["page_obj"]]
+
+
+def test_new_post_invalidates_feeds(
+        client, mixer, user, published_category,
+        many_posts_with_published_locations):
+    client.get("/")
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now())
+    response = client.get("/")
+    assert response.context["page_obj"][0].id == post.id, (
+        "Убедитесь, что сохранение поста сбрасывает кэш ленты."
+    )
+
+
+def test_stale_page_served_while_recomputing(
+        mixer, user, published_category,
+        many_posts_with_published_locations):
+    request = RequestFactory().get("/")
+    queryset = posts_queryset(hide=True)
+    old_ids = [
+        p.id for p in feed_cache.cached_page_paginator(
+            "index", queryset, request)["page_obj"]
+    ]
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True)
+    version = feed_cache.get_version("index")
+    cache.add(f"feed:index:v{version}:pfirst:lock", 1)
+
+    page = feed_cache.cached_page_paginator(
+        "index", queryset, request)["page_obj"]
+    assert [p.id for p in page] == old_ids, (
+        "Убедитесь, что пока страницу пересчитывает другой запрос,"
+        " отдаётся её прошлая версия."
+    )
+
+
+@pytest.mark.parametrize("keyset, param, junk", [
+    (True, "cursor", ["junk", "x" * 500, "bjpbe30sMV0"]),
+    (False, "page", ["abc", "2.0", "99999"]),
+])
+def test_junk_page_params_do_not_grow_cache(
+        settings, many_posts_with_published_locations, keyset, param, junk):
+    settings.KEYSET_PAGINATION = keyset
+    queryset = posts_queryset(hide=True)
+    for value in junk:
+        feed_cache.cached_page_paginator(
+            "index", queryset, RequestFactory().get("/", {param: value}))
+    keys = [key for key in cache._cache if ":feed:index:v" in key]
+    assert len(keys) <= 2 and all(len(key) < 250 for key in keys), (
+        "Убедитесь, что неверные курсоры и номера страниц не создают"
+        " новых записей в кэше лент."
+    )
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from bs4 import BeautifulSoup
+from django.utils import timezone
+
+from blog.page_paginator import encode_cursor
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts_with_equal_pub_dates(mixer, user, published_category):
+    pub_date = timezone.now() - timedelta(days=1)
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_date,
+    )
+
+
+def _cursor_links(response):
+    soup = BeautifulSoup(response.content.decode("utf-8"), "html.parser")
+    links = {}
+    for a in soup.select("a.page-link"):
+        query = parse_qs(urlparse(a["href"]).query)
+        if "cursor" in query:
+            links[a.get_text(strip=True)] = query["cursor"][0]
+    return links
+
+
+def test_keyset_walk(user_client, posts_with_equal_pub_dates):
+    expected = sorted(
+        (post.id for post in posts_with_equal_pub_dates), reverse=True)
+
+    seen_pages = []
+    cursor = None
+    while True:
+        response = user_client.get("/", {"cursor": cursor} if cursor else {})
+        page_obj = response.context["page_obj"]
+        assert len(page_obj) <= N_PER_PAGE
+        seen_pages.append([post.id for post in page_obj])
+        cursor = _cursor_links(response).get(">>")
+        if not cursor:
+            break
+    assert [i for page in seen_pages for i in page] == expected, (
+        "Убедитесь, что курсорная пагинация выдаёт все публикации ровно"
+        " один раз, даже при совпадающих датах публикации."
+    )
+
+    back_cursor = _cursor_links(response).get("<<")
+    assert back_cursor, (
+        "Убедитесь, что на последней странице есть ссылка на предыдущую."
+    )
+    response = user_client.get("/", {"cursor": back_cursor})
+    assert [post.id for post in response.context["page_obj"]] == (
+        seen_pages[-2]
+    ), "Убедитесь, что ссылка «<<» ведёт на предыдущую страницу."
+
+
+def test_invalid_cursor_shows_first_page(
+        user_client, posts_with_equal_pub_dates):
+    response = user_client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+    assert not response.context["page_obj"].has_previous()
+
+
+@pytest.mark.parametrize("payload", [
+    ["n", [{}, 1]],
+    ["n", [None, None]],
+    ["p", ["", 1]],
+    ["n", [True, [1]]],
+    ["n", ["2024-01-01T00:00:00+00:00", 10 ** 30]],
+])
+def test_malformed_cursor_shows_first_page(
+        user_client, posts_with_equal_pub_dates, payload):
+    response = user_client.get("/", {"cursor": encode_cursor(*payload)})
+    assert response.status_code == 200, (
+        "Убедитесь, что испорченный курсор не приводит к ошибке сервера."
+    )
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+    assert not response.context["page_obj"].has_previous()
+
+
+def test_cursor_past_the_end(user_client, posts_with_equal_pub_dates):
+    cursor = encode_cursor("n", ["2000-01-01T00:00:00+00:00", 1])
+    response = user_client.get("/", {"cursor": cursor})
+    assert response.status_code == 200 and not (
+        response.context["page_obj"]), (
+        "Убедитесь, что курсор за концом ленты даёт пустую страницу."
+    )
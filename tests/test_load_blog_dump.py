@@ -0,0 +1,55 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.management.commands.load_blog_dump import iter_dump
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+DUMP = Path(__file__).resolve().parent.parent / "blogicum" / "db.json"
+
+
+def test_iter_dump_reads_by_objects():
+    items = [{"model": "blog.category", "pk": i, "text": "ё" * i}
+             for i in range(50)]
+    stream = io.StringIO(json.dumps(items, ensure_ascii=False, indent=2))
+    assert list(iter_dump(stream, read_size=7)) == items, (
+        "Убедитесь, что дамп разбирается по объектам при чтении"
+        " небольшими кусками."
+    )
+
+
+def test_load_blog_dump(tmp_path):
+    call_command(
+        "load_blog_dump", str(DUMP), batch_size=5, stdout=io.StringIO())
+    dump = json.loads(DUMP.read_text(encoding="utf-8"))
+    posts = [item for item in dump if item["model"] == "blog.post"]
+    assert Post.objects.count() == len(posts)
+    assert Category.objects.count() == sum(
+        item["model"] == "blog.category" for item in dump)
+    first = Post.objects.get(pk=posts[0]["pk"])
+    assert first.created_at.isoformat().startswith(
+        posts[0]["fields"]["created_at"][:19]), (
+        "Убедитесь, что даты из дампа не перезаписываются при загрузке."
+    )
+    assert Post.objects.filter(is_visible=True).exists(), (
+        "Убедитесь, что после загрузки пересчитывается видимость постов."
+    )
+
+    comments = tmp_path / "comments.json"
+    comments.write_text(json.dumps([
+        {"model": "blog.comment", "pk": pk, "fields": {
+            "text": "Комментарий", "post": first.pk, "author": 1,
+            "created_at": "2023-01-01T00:00:00Z", "is_published": True}}
+        for pk in (1, 2)
+    ]))
+    call_command("load_blog_dump", str(comments), stdout=io.StringIO())
+    assert Comment.objects.count() == 2
+    assert Post.objects.get(pk=first.pk).comment_count == 2, (
+        "Убедитесь, что после загрузки пересчитываются счётчики"
+        " комментариев."
+    )
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+DATA = bytes(range(256)) * 4
+
+
+def _read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_media_served_with_validators(media, client):
+    (media / "files").mkdir()
+    (media / "files" / "data.bin").write_bytes(DATA)
+    response = client.get("/media/files/data.bin")
+    assert response.status_code == HTTPStatus.OK and _read(response) == DATA
+    assert response["Accept-Ranges"] == "bytes" and response["ETag"], (
+        "Убедитесь, что медиафайлы отдаются с ETag и поддержкой Range."
+    )
+
+    response = client.get(
+        "/media/files/data.bin", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что на If-None-Match с тем же ETag возвращается 304."
+    )
+    assert client.get("/media/../settings.py").status_code in (
+        HTTPStatus.BAD_REQUEST, HTTPStatus.NOT_FOUND)
+
+
+def test_media_range_requests(media, client):
+    (media / "data.bin").write_bytes(DATA)
+    response = client.get("/media/data.bin", HTTP_RANGE="bytes=10-19")
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT and _read(
+        response) == DATA[10:20], (
+        "Убедитесь, что на запрос диапазона отдаётся только его часть."
+    )
+    assert response["Content-Range"] == f"bytes 10-19/{len(DATA)}"
+    assert response["Content-Length"] == "10"
+
+    response = client.get("/media/data.bin", HTTP_RANGE="bytes=-5")
+    assert _read(response) == DATA[-5:]
+
+    response = client.get(
+        "/media/data.bin", HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"old"')
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что при устаревшем If-Range файл отдаётся целиком."
+    )
+
+    response = client.get("/media/data.bin", HTTP_RANGE="bytes=5000-")
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+
+
+def test_content_addressed_media_immutable(media, client, settings):
+    name = default_storage.save("posts_images/photo.jpg", ContentFile(DATA))
+    response = client.get(f"/media/{name}")
+    assert "immutable" in response["Cache-Control"] and response[
+        "ETag"].strip('"') in name, (
+        "Убедитесь, что файлы с хэшем содержимого кэшируются навсегда."
+    )
+
+    settings.MEDIA_OFFLOAD_HEADER = "X-Accel-Redirect"
+    response = client.get(f"/media/{name}")
+    assert response["X-Accel-Redirect"] == (
+        f"{settings.MEDIA_OFFLOAD_PREFIX}{name}") and not response.content, (
+        "Убедитесь, что при MEDIA_OFFLOAD_HEADER файл отдаёт фронтенд-сервер."
+    )
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_cached_page_is_shared_between_visitors(
+        client, user, user_client, post_with_published_location):
+    anonymous = client.get("/").content.decode("utf-8")
+    assert "<!--hole:" not in anonymous
+
+    with CaptureQueriesContext(connection) as queries:
+        personal = user_client.get("/").content.decode("utf-8")
+    assert not any('"blog_post"' in q["sql"] for q in queries), (
+        "Убедитесь, что главная страница отдаётся из кэша без запросов"
+        " к публикациям."
+    )
+    assert "Войти" in anonymous and "Войти" not in personal, (
+        "Убедитесь, что блок входа в шапке заполняется для каждого"
+        " посетителя отдельно."
+    )
+    assert f"/profile/{user.username}/" in personal
+
+
+def test_comment_form_hole_has_csrf(
+        client, user_client, another_user, post_with_published_location):
+    post = post_with_published_location
+    post.author = another_user
+    post.save()
+    url = f"/posts/{post.id}/"
+    anonymous = client.get(url).content.decode("utf-8")
+    assert "csrfmiddlewaretoken" not in anonymous
+    personal = user_client.get(url).content.decode("utf-8")
+    assert "csrfmiddlewaretoken" in personal
+    assert f"/posts/{post.id}/comment" in personal
+
+
+def test_comment_invalidates_page(
+        client, user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    client.get(url)
+    user_client.post(f"{url}comment", data={"text": "Свежий комментарий"})
+    assert "Свежий комментарий" in client.get(url).content.decode("utf-8")
+
+
+def test_junk_query_params_share_cached_page(
+        client, post_with_published_location):
+    client.get("/")
+    for query in ("?utm_source=x", "?cursor=junk", "?page=2&b=1"):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f"/{query}")
+        assert response.status_code == 200 and not any(
+            '"blog_post"' in q["sql"] for q in queries), (
+            "Убедитесь, что параметры, которые страница не читает, и "
+            "испорченный курсор не дают отдельной копии страницы в кэше."
+        )
@@ -0,0 +1,36 @@
+import pytest
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_card_fragment_is_cached(
+        user, user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/profile/{user.username}/"
+    assert post.title in user_client.get(url).content.decode("utf-8")
+
+    Post.objects.filter(pk=post.pk).update(title="Заголовок в обход кэша")
+    content = user_client.get(url).content.decode("utf-8")
+    assert post.title in content, (
+        "Убедитесь, что карточка поста берётся из кэша фрагментов, пока"
+        " пост не изменился."
+    )
+
+    post.refresh_from_db()
+    post.title = "Новый заголовок"
+    post.save()
+    assert "Новый заголовок" in user_client.get(url).content.decode("utf-8"), (
+        "Убедитесь, что ключ кэша карточки зависит от времени изменения"
+        " поста."
+    )
+
+
+def test_post_card_follows_comment_count(
+        user, user_client, another_user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/profile/{user.username}/"
+    assert "Комментарии (0)" in user_client.get(url).content.decode("utf-8")
+    another_user_client.post(f"/posts/{post.id}/comment", data={"text": "!"})
+    assert "Комментарии (1)" in user_client.get(url).content.decode("utf-8")
@@ -0,0 +1,60 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+FULL_SCAN = re.compile(r"\bSCAN (TABLE )?blog_post\b(?! USING)")
+TEMP_BTREE = re.compile(r"USE TEMP B-TREE FOR .*ORDER BY")
+
+
+def _feed_plans(client, url, params=None):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params or {})
+    assert response.status_code == 200
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or '"blog_post"' not in sql:
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+    assert plans, f"Не найдено запросов к публикациям на странице {url}."
+    return response, plans
+
+
+def _next_cursor(response):
+    return response.context["page_obj"].next_cursor
+
+
+@pytest.mark.parametrize("feed", ["index", "category", "profile", "owner"])
+def test_feed_uses_indexes(
+        feed, user, user_client, another_user_client,
+        many_posts_with_published_locations, published_category):
+    client = another_user_client
+    url = "/"
+    if feed == "category":
+        url = f"/category/{published_category.slug}/"
+    elif feed in ("profile", "owner"):
+        url = f"/profile/{user.username}/"
+        if feed == "owner":
+            client = user_client
+
+    response, plans = _feed_plans(client, url)
+    cursor = _next_cursor(response)
+    assert cursor
+    plans += _feed_plans(client, url, {"cursor": cursor})[1]
+
+    for sql, plan in plans:
+        for step in plan:
+            assert not FULL_SCAN.search(step), (
+                f"Запрос ленты `{feed}` полностью сканирует blog_post:\n"
+                f"{sql}\n{plan}"
+            )
+            assert not TEMP_BTREE.search(step), (
+                f"Запрос ленты `{feed}` сортирует через временное B-дерево:\n"
+                f"{sql}\n{plan}"
+            )
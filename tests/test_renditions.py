@@ -0,0 +1,91 @@
+import io
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from PIL import Image
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_renditions_built_on_save(
+        jpeg, media, client, django_capture_on_commit_callbacks,
+        post_with_published_location):
+    post = post_with_published_location
+    with django_capture_on_commit_callbacks(execute=True):
+        post.image = jpeg(2000, 1000)
+        post.save()
+    post.refresh_from_db()
+    card = post.image_meta["renditions"]["card"]
+    assert [width for width, _ in card["webp"]] == [640, 1280]
+    for width, name in card["webp"] + card["fallback"]:
+        with Image.open(media / name) as image:
+            assert image.size == (width, width // 2), (
+                "Убедитесь, что копии картинки уменьшаются с сохранением"
+                " пропорций."
+            )
+
+    assert post.image_meta["width"] == 2000 and post.image_meta[
+        "height"] == 1000 and post.image_meta["format"] == "JPEG", (
+        "Убедитесь, что размеры и формат картинки сохраняются в посте."
+    )
+
+    content = client.get("/").content.decode()
+    assert 'type="image/webp"' in content and "640w" in content, (
+        "Убедитесь, что лента выводит копии картинки через srcset."
+    )
+
+
+def test_feed_does_not_open_images(
+        monkeypatch, client, post_with_published_location):
+    post = post_with_published_location
+    assert post.image_meta["width"] == 100 and len(
+        post.image_meta["sha256"]) == 64, (
+        "Убедитесь, что данные картинки сохраняются при загрузке."
+    )
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError(
+            "Убедитесь, что при выводе ленты файлы картинок не открываются.")
+
+    monkeypatch.setattr(FileSystemStorage, "open", forbidden)
+    monkeypatch.setattr(FileSystemStorage, "exists", forbidden)
+    monkeypatch.setattr(FileSystemStorage, "size", forbidden)
+    content = client.get("/").content.decode()
+    assert 'width="100" height="100" loading="lazy"' in content, (
+        "Убедитесь, что карточка выводит размеры картинки и loading=lazy."
+    )
+
+
+def test_new_image_drops_old_renditions(
+        jpeg, django_capture_on_commit_callbacks,
+        post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(
+        image_meta={"renditions": {"card": {"webp": [], "fallback": []}}})
+    post.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=False):
+        post.image = jpeg(300, 200)
+        post.save()
+    post.refresh_from_db()
+    assert "renditions" not in post.image_meta, (
+        "Убедитесь, что при смене картинки старые копии не выводятся."
+    )
+    assert (post.image_meta["width"], post.image_meta["height"]) == (
+        300, 200)
+
+
+def test_backfill_command(jpeg, post_with_published_location):
+    post = post_with_published_location
+    post.image.save("old.jpg", jpeg(800, 800), save=False)
+    Post.objects.filter(pk=post.pk).update(
+        image=post.image.name, image_meta={})
+    call_command("build_renditions", workers=2, stdout=io.StringIO())
+    post.refresh_from_db()
+    assert [width for width, _ in post.image_meta["renditions"]["detail"][
+        "fallback"]] == [800], (
+        "Убедитесь, что команда строит копии для уже загруженных картинок"
+        " и не увеличивает маленькие."
+    )
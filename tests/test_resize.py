@@ -0,0 +1,106 @@
+import io
+import os
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from PIL import Image
+
+from blog import resize
+
+
+@pytest.fixture(autouse=True)
+def photo(media):
+    resize._cache_bytes.clear()
+    image = Image.new("RGB", (400, 300), (30, 120, 200))
+    (media / "pictures").mkdir()
+    image.save(media / "pictures" / "photo.jpg", "JPEG")
+
+
+def _size(response):
+    data = b"".join(response.streaming_content)
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def test_resize_endpoint(media, client, settings):
+    settings.RESIZE_SIZES = {(200, 0), (120, 120), (2000, 0)}
+    response = client.get("/media/r/200x0/pictures/photo.jpg")
+    assert response.status_code == HTTPStatus.OK and _size(response) == (
+        200, 150), (
+        "Убедитесь, что /media/r/<ширина>x0/ уменьшает картинку с "
+        "сохранением пропорций."
+    )
+    assert (media / "r" / "200x0" / "pictures" / "photo.jpg").exists(), (
+        "Убедитесь, что копия сохраняется в дисковый кэш."
+    )
+
+    response = client.get("/media/r/120x120/pictures/photo.jpg")
+    assert _size(response) == (120, 120), (
+        "Убедитесь, что при обеих сторонах картинка кадрируется по рамке."
+    )
+    assert _size(client.get("/media/r/2000x0/pictures/photo.jpg")) == (
+        400, 300), "Убедитесь, что картинка не увеличивается."
+
+    for url in (
+        "/media/r/0x0/pictures/photo.jpg",
+        "/media/r/200x0/pictures/missing.jpg",
+        "/media/r/200x0/r/200x0/pictures/photo.jpg",
+    ):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, url
+    assert client.get(
+        "/media/r/300x0/pictures/photo.jpg").status_code == (
+        HTTPStatus.NOT_FOUND), (
+        "Убедитесь, что копии строятся только размеров из RESIZE_SIZES."
+    )
+
+
+def test_concurrent_requests_coalesced(monkeypatch):
+    calls = []
+    render = resize.render
+
+    def slow_render(*args):
+        calls.append(args)
+        time.sleep(0.2)
+        return render(*args)
+
+    monkeypatch.setattr(resize, "render", slow_render)
+    threads = [
+        threading.Thread(
+            target=resize.ensure_resized, args=("pictures/photo.jpg", 64, 0))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1, (
+        "Убедитесь, что одновременные запросы одной копии строят её один раз."
+    )
+
+
+def test_cache_evicts_least_recently_used(media, settings):
+    widths = (100, 110, 120, 130)
+    for offset, width in enumerate(widths):
+        name = resize.ensure_resized("pictures/photo.jpg", width, 0)
+        # Старые копии запрашивались давно.
+        then = time.time() - 1000 + offset
+        os.utime(media / name, (then, then))
+    sizes = {
+        width: (media / resize.resized_name(
+            width, 0, "pictures/photo.jpg")).stat().st_size
+        for width in widths
+    }
+    settings.RESIZE_CACHE_MAX_BYTES = sum(sizes.values())
+    resize.ensure_resized("pictures/photo.jpg", 140, 0)
+
+    remaining = {
+        path.parent.parent.name for path in (media / "r").rglob("*.jpg")
+    }
+    assert "100x0" not in remaining and "140x0" in remaining, (
+        "Убедитесь, что при переполнении кэша удаляются давно не "
+        "запрошенные копии."
+    )
+    total = sum(path.stat().st_size for path in (media / "r").rglob("*.jpg"))
+    assert total <= settings.RESIZE_CACHE_MAX_BYTES
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Post, PostQuerySet
+from blog.scheduler import PublicationScheduler
+from blog.signals import posts_published
+
+pytestmark = [pytest.mark.django_db]
+
+
+class Clock:
+    def __init__(self):
+        self.now = timezone.now()
+
+    def __call__(self):
+        return self.now
+
+
+def test_scheduler_publishes_on_time(mixer, user, published_category):
+    clock = Clock()
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=clock.now + timedelta(seconds=30),
+    )
+    received = []
+
+    def on_published(sender, post_ids, **kwargs):
+        received.extend(post_ids)
+
+    posts_published.connect(on_published)
+    try:
+        scheduler = PublicationScheduler(reload_interval=60, clock=clock)
+        pause = scheduler.tick()
+        assert pause == pytest.approx(30, abs=1), (
+            "Убедитесь, что планировщик просыпается к ближайшей дате"
+            " публикации."
+        )
+        assert not Post.objects.get(pk=post.pk).is_visible
+
+        clock.now += timedelta(seconds=pause)
+        scheduler.tick()
+    finally:
+        posts_published.disconnect(on_published)
+
+    assert Post.objects.get(pk=post.pk).is_visible, (
+        "Убедитесь, что планировщик открывает пост в его дату публикации."
+    )
+    assert received == [post.pk], (
+        "Убедитесь, что при открытии поста отправляется сигнал"
+        " `posts_published`."
+    )
+
+
+def test_publish_due_rechecks_predicate(
+        mixer, user, published_category, monkeypatch):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1))
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1))
+    values_list = PostQuerySet.values_list
+
+    def unpublished_meanwhile(self, *args, **kwargs):
+        ids = list(values_list(self, *args, **kwargs))
+        Post.objects.filter(pk=post.pk).update(is_published=False)
+        return ids
+
+    monkeypatch.setattr(PostQuerySet, "values_list", unpublished_meanwhile)
+    Post.objects.publish_due()
+    post.refresh_from_db()
+    assert not post.is_visible, (
+        "Убедитесь, что пост, снятый с публикации между выбором и "
+        "обновлением, не открывается."
+    )
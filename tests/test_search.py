@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def searchable_posts(mixer, user, published_category, published_location):
+    def blend(title, text, is_published=True):
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            location=published_location, is_published=is_published,
+            pub_date=published_category.created_at, title=title, text=text)
+
+    return {
+        "title": blend("Ежик в тумане", "Прогулка вечером."),
+        "text": blend("Прогулка", "Встретили ежика у реки."),
+        "other": blend("Кот", "Рыжий кот спит."),
+        "hidden": blend("Ежик", "Скрытый ежик.", is_published=False),
+    }
+
+
+def _found(client, query, cursor=""):
+    response = client.get("/search/", {"q": query, "cursor": cursor})
+    assert response.status_code == 200
+    return response, [post.id for post in response.context["page_obj"]]
+
+
+def test_search_ranks_and_hides(client, searchable_posts):
+    _, found = _found(client, "ежик")
+    assert found == [
+        searchable_posts["title"].id, searchable_posts["text"].id], (
+        "Убедитесь, что поиск находит видимые посты и ставит совпадение в"
+        " заголовке выше совпадения в тексте."
+    )
+
+
+def test_search_index_follows_edits(client, searchable_posts):
+    post = searchable_posts["other"]
+    post.text = "Кот ловит ежика."
+    post.save()
+    searchable_posts["title"].delete()
+    _, found = _found(client, "ежик")
+    assert set(found) == {searchable_posts["text"].id, post.id}, (
+        "Убедитесь, что индекс поиска обновляется при изменении и удалении"
+        " постов."
+    )
+
+
+def test_search_pages_by_cursor(settings, client, searchable_posts):
+    settings.ITEMS_PER_PAGE = 1
+    response, first = _found(client, "ежик")
+    _, second = _found(
+        client, "ежик", cursor=response.context["page_obj"].next_cursor)
+    assert first + second == [
+        searchable_posts["title"].id, searchable_posts["text"].id], (
+        "Убедитесь, что результаты поиска разбиты на страницы курсором."
+    )
+
+
+def test_search_uses_fts_index(client, searchable_posts):
+    with CaptureQueriesContext(connection) as queries:
+        _found(client, "ежик")
+    sql = next(q["sql"] for q in queries if "MATCH" in q["sql"])
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        plan = " ".join(row[-1] for row in cursor.fetchall())
+    assert "VIRTUAL TABLE INDEX" in plan and "SCAN post" not in plan, (
+        "Убедитесь, что поиск идёт по индексу FTS5, а не перебором постов."
+    )
+
+
+def test_search_ignores_fts_syntax(client, searchable_posts):
+    _, found = _found(client, 'ежик*" (-')
+    assert len(found) == 2, (
+        "Убедитесь, что спецсимволы FTS5 в запросе не ломают поиск."
+    )
@@ -0,0 +1,63 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from blog.sqlite.base import DatabaseWrapper
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_wrapper(path, **pragmas):
+    settings_dict = {
+        **connection.settings_dict, "NAME": str(path), "PRAGMAS": pragmas}
+    return DatabaseWrapper(settings_dict, alias="sqlite_test")
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_applied_on_connect(tmp_path):
+    wrapper = make_wrapper(tmp_path / "db.sqlite3", cache_size=-4000)
+    try:
+        assert pragma(wrapper, "journal_mode") == "wal", (
+            "Убедитесь, что база работает в режиме WAL."
+        )
+        assert pragma(wrapper, "synchronous") == 1 and (
+            pragma(wrapper, "temp_store") == 2), (
+            "Убедитесь, что заданы synchronous=NORMAL и temp_store=MEMORY."
+        )
+        assert pragma(wrapper, "cache_size") == -4000, (
+            "Убедитесь, что прагмы из настроек PRAGMAS переопределяют "
+            "значения по умолчанию."
+        )
+    finally:
+        wrapper.close()
+
+    with pytest.raises(ImproperlyConfigured):
+        make_wrapper(tmp_path / "db.sqlite3", **{"cache_size": "1; DROP"}
+                     ).pragmas()
+
+
+def test_reader_does_not_block_writer(tmp_path):
+    reader = make_wrapper(tmp_path / "db.sqlite3", busy_timeout=0)
+    writer = make_wrapper(tmp_path / "db.sqlite3", busy_timeout=0)
+    try:
+        with writer.cursor() as cursor:
+            cursor.execute("CREATE TABLE item (id INTEGER PRIMARY KEY)")
+        with reader.cursor() as cursor:
+            # Открытая транзакция чтения держит снимок базы.
+            cursor.execute("BEGIN")
+            cursor.execute("SELECT count(*) FROM item")
+            with writer.cursor() as write_cursor:
+                write_cursor.execute("INSERT INTO item DEFAULT VALUES")
+            cursor.execute("SELECT count(*) FROM item")
+            assert cursor.fetchone()[0] == 0, (
+                "Убедитесь, что читатель видит согласованный снимок базы."
+            )
+            cursor.execute("ROLLBACK")
+    finally:
+        reader.close()
+        writer.close()
@@ -0,0 +1,53 @@
+import gzip
+import io
+from http import HTTPStatus
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command("collectstatic", "--noinput", stdout=io.StringIO())
+    return tmp_path
+
+
+def _read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_collectstatic_writes_hashed_compressed_files(collected):
+    hashed = staticfiles_storage.stored_name("css/bootstrap.min.css")
+    assert hashed != "css/bootstrap.min.css" and (collected / hashed).exists(), (
+        "Убедитесь, что collectstatic добавляет к именам хэш содержимого."
+    )
+    original = (collected / hashed).read_bytes()
+    assert gzip.decompress(
+        (collected / f"{hashed}.gz").read_bytes()) == original, (
+        "Убедитесь, что collectstatic пишет сжатые gzip копии."
+    )
+
+
+@pytest.mark.django_db
+def test_middleware_serves_precompressed_variant(collected, client):
+    hashed = staticfiles_storage.stored_name("css/bootstrap.min.css")
+    url = f"/static/{hashed}"
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Encoding"] == "gzip", (
+        "Убедитесь, что по Accept-Encoding отдаётся сжатая копия."
+    )
+    assert gzip.decompress(_read(response)) == (collected / hashed).read_bytes()
+    assert "immutable" in response["Cache-Control"] and (
+        "max-age=31536000" in response["Cache-Control"]), (
+        "Убедитесь, что статика с хэшем в имени кэшируется на год."
+    )
+    assert "Accept-Encoding" in response["Vary"]
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0")
+    assert not response.has_header("Content-Encoding"), (
+        "Убедитесь, что без поддержки сжатия отдаётся исходный файл."
+    )
+    assert client.get("/").status_code == HTTPStatus.OK
@@ -0,0 +1,120 @@
+import io
+import re
+
+import pytest
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+
+from blog import renditions
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+SHARDED = re.compile(r"^posts_images/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.jpg$")
+
+
+def _stored(media):
+    return sorted(
+        path.relative_to(media).as_posix()
+        for path in (media / "posts_images").rglob("*") if path.is_file()
+    )
+
+
+def test_identical_uploads_share_file(
+        jpeg, media, django_capture_on_commit_callbacks, mixer, user):
+    first, second = mixer.cycle(2).blend("blog.Post", author=user, image="")
+    with django_capture_on_commit_callbacks(execute=True):
+        first.image = jpeg(color=(10, 20, 30), name="one.jpg")
+        first.save()
+        second.image = jpeg(color=(10, 20, 30), name="two.JPG")
+        second.save()
+    assert SHARDED.match(first.image.name), (
+        "Убедитесь, что картинка хранится по хэшу содержимого в дереве "
+        "ab/cd/<sha256>.jpg."
+    )
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые загрузки хранятся одним файлом."
+    )
+    assert _stored(media) == [first.image.name]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert _stored(media) == [second.image.name], (
+        "Убедитесь, что файл не удаляется, пока на него ссылается пост."
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not (media / second.image.name).exists(), (
+        "Убедитесь, что файл удаляется вместе с последней ссылкой на него."
+    )
+    assert not list((media / "renditions").rglob("*.webp")), (
+        "Убедитесь, что копии картинки удаляются вместе с ней."
+    )
+
+
+def test_replaced_image_released(
+        jpeg, media, django_capture_on_commit_callbacks, mixer, user):
+    post = mixer.blend("blog.Post", author=user, image="")
+    with django_capture_on_commit_callbacks(execute=True):
+        post.image = jpeg(color=(200, 0, 0))
+        post.save()
+    old_name = post.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        post.image = jpeg(color=(0, 0, 200))
+        post.save()
+    assert _stored(media) == [post.image.name] and old_name != (
+        post.image.name), (
+        "Убедитесь, что прежняя картинка удаляется после замены."
+    )
+
+
+def test_reused_file_survives_pending_release(
+        jpeg, media, settings, monkeypatch, mixer, user):
+    settings.CONTENT_RELEASE_GRACE = 60
+    retries = []
+    monkeypatch.setattr(
+        renditions, "release_later", lambda name, storage: retries.append(
+            name))
+    post = mixer.blend("blog.Post", author=user, image="")
+    post.image = jpeg(color=(5, 5, 5))
+    post.save()
+    name = post.image.name
+    # Пост удалён, а новая загрузка того же файла ещё не в базе.
+    Post.objects.filter(pk=post.pk).delete()
+    assert default_storage.save("posts_images/again.jpg", jpeg(
+        color=(5, 5, 5))) == name
+    assert not renditions.release_image(name) and (media / name).exists(), (
+        "Убедитесь, что повторно использованный файл не удаляется, пока "
+        "ссылка на него может быть в незавершённой транзакции."
+    )
+    assert retries == [name], (
+        "Убедитесь, что отложенное удаление повторяется позже."
+    )
+
+
+def test_rehome_media(jpeg, media, mixer, user):
+    legacy = FileSystemStorage(location=media)
+    name = legacy.save("posts_images/legacy.jpg", jpeg(color=(1, 2, 3)))
+    posts = mixer.cycle(2).blend("blog.Post", author=user, image=name)
+    call_command("rehome_media", "--delete-old", stdout=io.StringIO())
+
+    names = set(
+        Post.objects.filter(pk__in=[post.pk for post in posts])
+        .values_list("image", flat=True)
+    )
+    assert len(names) == 1 and SHARDED.match(names.pop()), (
+        "Убедитесь, что команда rehome_media переносит картинки в "
+        "хранилище по содержимому."
+    )
+    post = Post.objects.get(pk=posts[0].pk)
+    assert _stored(media) == [post.image.name], (
+        "Убедитесь, что старые файлы удаляются при --delete-old."
+    )
+    stem = post.image.name.rsplit(".", 1)[0]
+    left = sorted(
+        path.relative_to(media / "renditions").as_posix()
+        for path in (media / "renditions").rglob("*") if path.is_file())
+    assert left and all(name.startswith(stem) for name in left), (
+        "Убедитесь, что копии строятся по новому пути, а копии по старому "
+        "пути удаляются."
+    )
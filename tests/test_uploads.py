@@ -0,0 +1,80 @@
+import io
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from blog.forms import PostForm
+from blog.uploads import ingest_image
+
+EXIF_ORIENTATION = 0x0112
+
+
+def _upload(image, image_format="JPEG", name="photo.jpg", **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def test_ingest_rotates_downscales_and_strips(settings):
+    settings.IMAGE_UPLOAD_MAX_SIDE = 500
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    exif[0x010F] = "Camera maker"
+    result = ingest_image(_upload(
+        Image.new("RGB", (2000, 1000), (10, 20, 30)), exif=exif.tobytes()))
+    with Image.open(result) as image:
+        assert image.format == "JPEG"
+        assert image.size == (250, 500), (
+            "Убедитесь, что загрузка поворачивается по EXIF и уменьшается"
+            " до IMAGE_UPLOAD_MAX_SIDE."
+        )
+        assert not image.getexif(), (
+            "Убедитесь, что метаданные EXIF удаляются из загрузки."
+        )
+
+
+def test_ingest_keeps_transparency():
+    result = ingest_image(_upload(
+        Image.new("RGBA", (40, 30), (0, 0, 0, 0)), "PNG", "logo.png"))
+    assert result.name == "logo.png"
+    with Image.open(result) as image:
+        assert image.mode == "RGBA"
+
+
+def test_ingest_strips_exif_from_png():
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    exif[0x0110] = "Camera model"
+    result = ingest_image(_upload(
+        Image.new("RGBA", (40, 30), (0, 0, 0, 0)), "PNG", "logo.png",
+        exif=exif.tobytes()))
+    with Image.open(result) as image:
+        assert image.format == "PNG" and not image.getexif(), (
+            "Убедитесь, что метаданные EXIF удаляются и из PNG."
+        )
+
+
+def test_ingest_rejects_bombs(settings):
+    settings.IMAGE_UPLOAD_MAX_PIXELS = 100 * 100
+    with pytest.raises(ValidationError):
+        ingest_image(_upload(Image.new("RGB", (101, 100))))
+
+
+@pytest.mark.django_db
+def test_post_form_ingests_image(settings, published_category):
+    settings.IMAGE_UPLOAD_MAX_SIDE = 64
+    form = PostForm(
+        data={
+            "title": "Заголовок", "text": "Текст",
+            "pub_date": "2024-01-01T10:00", "category": published_category.pk,
+            "is_published": True,
+        },
+        files={"image": _upload(Image.new("RGB", (640, 320)))},
+    )
+    assert form.is_valid(), form.errors
+    with Image.open(form.cleaned_data["image"]) as image:
+        assert image.size == (64, 32), (
+            "Убедитесь, что форма поста сохраняет уменьшенную картинку."
+        )
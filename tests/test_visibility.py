@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _visible(post):
+    return Post.objects.values_list("is_visible", flat=True).get(pk=post.pk)
+
+
+def test_visibility_follows_category(post_with_published_location):
+    post = post_with_published_location
+    category = post.category
+    assert _visible(post)
+
+    category.is_published = False
+    category.save()
+    assert not _visible(post), (
+        "Убедитесь, что снятие категории с публикации скрывает её посты."
+    )
+
+    category.is_published = True
+    category.save()
+    assert _visible(post)
+
+    category.delete()
+    assert not _visible(post), (
+        "Убедитесь, что посты удалённой категории скрываются."
+    )
+
+
+def test_due_posts_are_published(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert not _visible(post)
+
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1))
+    call_command("publish_due_posts")
+    assert _visible(post), (
+        "Убедитесь, что отложенный пост открывается, когда наступает"
+        " дата публикации."
+    )
+
+
+def test_hidden_post_detail(
+        user_client, another_user_client, posts_with_unpublished_category):
+    post = posts_with_unpublished_category[0]
+    assert user_client.get(f"/posts/{post.id}/").status_code == 200
+    assert another_user_client.get(f"/posts/{post.id}/").status_code == 404
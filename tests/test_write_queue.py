@@ -0,0 +1,168 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import override_settings
+from PIL import Image
+
+from blog import renditions, write_queue
+from blog.middleware import SessionMiddleware
+
+
+@pytest.fixture
+def writer():
+    """Свой писатель на тест: размер очереди читается при запуске."""
+    write_queue._writer = None
+    yield write_queue.get_writer
+    if write_queue._writer is not None:
+        write_queue._writer.stop(timeout=5)
+        write_queue._writer = None
+
+
+def blocked_writer(release):
+    """Занимаем писателя, пока не выставлено событие release."""
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=write_queue.run, args=(block,))
+    thread.start()
+    started.wait(5)
+    return thread
+
+
+def test_inline_inside_transaction(writer, db):
+    assert connection.in_atomic_block
+    assert write_queue.run(threading.current_thread) is (
+        threading.current_thread()), (
+        "Убедитесь, что внутри открытой транзакции запись выполняется сразу."
+    )
+    assert write_queue._writer is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comments_written_by_single_writer(
+        writer, user, post_with_published_location, mixer):
+    post = post_with_published_location
+    comments = mixer.cycle(30).blend(
+        "blog.Comment", post=post, author=user, _commit=False)
+    threads = set()
+
+    def save(comment):
+        def job():
+            threads.add(threading.current_thread().name)
+            comment.save()
+        write_queue.run(job)
+        connection.close()
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        list(pool.map(save, comments))
+    post.refresh_from_db()
+    assert post.comments.count() == 30 and post.comment_count == 30, (
+        "Убедитесь, что все комментарии из разных потоков сохранены."
+    )
+    assert threads == {"db-writer"}, (
+        "Убедитесь, что записи выполняет один поток-писатель."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_image_stored_before_queue(
+        writer, monkeypatch, user_client, published_category):
+    threads = []
+
+    def record(func):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return func(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(
+        default_storage, "_save", record(default_storage._save))
+    monkeypatch.setattr(
+        renditions, "image_metadata", record(renditions.image_metadata))
+    # Копии строит свой пул, к очереди записи он не относится.
+    monkeypatch.setattr(renditions, "schedule_renditions", lambda post: None)
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30)).save(buffer, "JPEG")
+    response = user_client.post("/posts/create/", {
+        "title": "title", "text": "text", "pub_date": "2020-01-01T00:00",
+        "category": published_category.id, "is_published": True,
+        "image": SimpleUploadedFile("photo.jpg", buffer.getvalue()),
+    })
+    assert response.status_code == 302
+    assert threads and "db-writer" not in threads, (
+        "Убедитесь, что картинка поста пишется в хранилище и хешируется до "
+        "очереди записи, а писатель вставляет только строку."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(WRITE_QUEUE_SIZE=1, WRITE_QUEUE_TIMEOUT=0.2)
+def test_back_pressure_and_failures(writer):
+    release = threading.Event()
+    blocker = blocked_writer(release)
+    applied = []
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # Единственное место в очереди занято — следующей записи нет места.
+        queued = pool.submit(write_queue.run, applied.append, "queued")
+        while not writer().jobs.full():
+            pass
+        with pytest.raises(write_queue.WriteQueueBusy):
+            write_queue.run(applied.append, "rejected")
+        # Запись, которая не началась за WRITE_QUEUE_TIMEOUT, отменяется.
+        with pytest.raises(write_queue.WriteQueueBusy):
+            queued.result()
+    release.set()
+    blocker.join(5)
+    assert applied == [], (
+        "Убедитесь, что отклонённые и отменённые записи не выполняются."
+    )
+
+    with pytest.raises(ValueError):
+        write_queue.run(int, "not a number")
+    assert write_queue.run(int, "42") == 42, (
+        "Убедитесь, что ошибка одной записи не ломает писателя."
+    )
+
+
+@pytest.mark.django_db
+def test_busy_queue_returns_503(
+        user_client, post_with_published_location, monkeypatch):
+    def busy(*args, **kwargs):
+        raise write_queue.WriteQueueBusy
+
+    monkeypatch.setattr(write_queue, "run", busy)
+    response = user_client.post(
+        f"/posts/{post_with_published_location.id}/comment",
+        {"text": "text"})
+    assert response.status_code == 503 and response.has_header(
+        "Retry-After"), (
+        "Убедитесь, что при переполненной очереди записи отдаётся 503."
+    )
+
+
+@pytest.mark.django_db
+def test_busy_queue_on_session_save_returns_503(rf, monkeypatch):
+    def busy(*args, **kwargs):
+        raise write_queue.WriteQueueBusy
+
+    def view(request):
+        request.session["seen"] = True
+        return HttpResponse("ok")
+
+    monkeypatch.setattr(write_queue, "run", busy)
+    middleware = SessionMiddleware(view)
+    response = middleware(rf.get("/"))
+    assert response.status_code == 503 and response.has_header(
+        "Retry-After"), (
+        "Убедитесь, что при переполненной очереди запись сессии после "
+        "представления тоже даёт ответ 503."
+    )